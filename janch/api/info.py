@@ -26,6 +26,14 @@ def get_all_loggers():
     return get_default_formatters()
 
 
+def get_all_caches():
+    """Get all cache classes
+    Returns: dict with cache type names are keys and cache classes as values
+
+    """
+    return get_default_caches()
+
+
 def get_all_formatters():
     """Get all formatter classes
     Returns: dict with formatter type names are keys and formatter classes as values
@@ -4,20 +4,29 @@ import asyncio
 from typing import Dict
 
 from janch.components import *
+from janch.components.caches import Cache
 from janch.components.formatters import Formatter
 from janch.components.gatherers import Gatherer
 from janch.components.inspectors import Inspector
 from janch.components.loggers import Logger
 from janch.utils import *
+from janch.utils import watcher, workers, plan
+from janch.utils.constants import SETTINGS_KEY
 
 
 def init(config: dict, environment: Dict[str, str],
          gatherers: Dict[str, Gatherer] = None,
          inspectors: Dict[str, Inspector] = None,
          formatters: Dict[str, Formatter] = None,
-         loggers: Dict[str, Logger] = None):
+         loggers: Dict[str, Logger] = None,
+         settings: dict = None,
+         caches: Dict[str, Cache] = None):
     """Initialize Janch by passing before using it programmatically
 
+    The optional top level 'janch' key of the config holds run settings rather than an item.
+    The inspect sections of the items are compiled into the inspection plan of every run, so
+    an invalid inspection is reported here
+
     Args:
         config: dict representation of the Janch yml
         environment: dict representing environment variables from dotenv
@@ -25,21 +34,33 @@ def init(config: dict, environment: Dict[str, str],
         inspectors: dict of the form {str : Inspector}
         formatters: dict of the form {str : Formatter}
         loggers: dict of the form {str : Logger}
+        settings: dict of run settings that take precedence over the ones in the config
+        caches: dict of the form {str : Cache}
 
     Returns:
 
+    Raises:
+        ValueError: listing the invalid inspections of the config
+
     """
+    config = dict(config)
+    context.settings.update(config.pop(SETTINGS_KEY, None) or {})
+    context.settings.update(settings or {})
+
     context.gatherers.update(get_default_gatherers())
     context.inspectors.update(get_default_inspectors())
     context.formatters.update(get_default_formatters())
     context.loggers.update(get_default_loggers())
+    context.caches.update(get_default_caches())
 
     context.config.update(config)
     context.gatherers.update(gatherers or {})
     context.inspectors.update(inspectors or {})
     context.loggers.update(loggers or {})
     context.formatters.update(formatters or {})
+    context.caches.update(caches or {})
     context.environment.update(environment)
+    context.plan.update(plan.compile(config, context.inspectors))
 
 
 def update_gatherers(gatherer: Dict[str, Gatherer]):
@@ -57,6 +78,8 @@ def update_gatherers(gatherer: Dict[str, Gatherer]):
 def update_inspectors(inspector: Dict[str, Inspector]):
     """Replace or add a Inspector. The key should be inspector type
 
+    The inspection plan of the initialized config is compiled again with it
+
     Args:
         inspector: dict
 
@@ -64,6 +87,8 @@ def update_inspectors(inspector: Dict[str, Inspector]):
 
     """
     context.inspectors.update(inspector)
+    context.plan.clear()
+    context.plan.update(plan.compile(context.config, context.inspectors))
 
 
 def update_loggers(logger: Dict[str, Logger]):
@@ -90,12 +115,56 @@ def update_formatters(formatter: Dict[str, Formatter]):
     context.formatters.update(formatter)
 
 
+def iter_results():
+    """Stream results of Janch after it has been initialized, in the order the items complete
+
+    Use it from within a running event loop, e.g. ``async for result in iter_results()``
+
+    Returns: async generator of janch.utils.engine.Result
+
+    """
+    return engine.iter_results()
+
+
+def update_caches(cache: Dict[str, Cache]):
+    """Replace or add a Cache. The key should be cache type
+
+    Args:
+        cache: dict
+
+    Returns:
+
+    """
+    context.caches.update(cache)
+
+
 def start():
     """Start the Janch after it has been initialized or with default settings
+
+    When the run settings ask for more than one worker the items are split across that many
+    processes
+
     Returns:
 
     """
+    count = context.settings.get('workers') or 1
+
     try:
-        asyncio.run(engine.start())
+        if count > 1:
+            asyncio.run(workers.start(count))
+        else:
+            asyncio.run(engine.start())
     except Exception as e:
         raise e
+
+
+def watch(until: float = None):
+    """Keep running Janch after it has been initialized, each item on its own interval
+
+    Args:
+        until: float seconds after which to stop. Runs forever when None
+
+    Returns:
+
+    """
+    asyncio.run(watcher.watch(until=until))
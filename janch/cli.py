@@ -3,7 +3,9 @@ import yaml
 from dotenv.main import dotenv_values
 
 from janch.api.info import *
-from janch.api.main import start, init
+from janch.api.main import start, init, watch as start_watching
+from janch.utils import sharding
+from janch.utils.constants import SETTINGS_KEY
 from janch.utils.display import FixedWidth
 
 dotenv_path = '.env'
@@ -14,27 +16,145 @@ def main():
     "Janch is a system checker configured using YAML"
 
 
-@click.argument('file', type=click.File('r'))
-@click.option('--item', type=str, required=False, help="Name of the item key from the yml file")
-@main.command()
-def run(file, item):
-    """Run janch using a defined yaml file"""
+def _concurrency_settings(concurrency, per_host, type_limit):
+    ret = {}
+
+    if concurrency is not None:
+        ret['limit'] = concurrency
+
+    if per_host is not None:
+        ret['per_host'] = per_host
+
+    for limit in type_limit:
+        gatherer_type, _, value = limit.partition('=')
+        if not value.isdigit():
+            raise click.BadParameter(f"Expected TYPE=N but got {limit}", param_hint='--type-limit')
+        ret.setdefault('per_type', {})[gatherer_type] = int(value)
+
+    return ret
+
+
+def _merge_settings(file_settings: dict, cli_settings: dict):
+    ret = dict(file_settings or {})
+
+    for k, v in cli_settings.items():
+        if isinstance(v, dict) and isinstance(ret.get(k), dict):
+            ret[k] = _merge_settings(ret[k], v)
+        else:
+            ret[k] = v
+
+    return ret
+
+
+def _common_options(command):
+    """Options shared by the commands that run the items of a yaml file"""
+    options = [
+        click.argument('file', type=click.File('r')),
+        click.option('--item', type=str, required=False,
+                     help="Name of the item key from the yml file"),
+        click.option('--concurrency', type=int, required=False,
+                     help="Maximum number of gathers in flight at once. 0 means unbounded"),
+        click.option('--per-host', type=int, required=False,
+                     help="Maximum number of gathers in flight against the same host"),
+        click.option('--type-limit', type=str, multiple=True,
+                     help="Maximum number of gathers in flight for a gatherer type e.g. command=4"),
+        click.option('--shard', type=str, required=False,
+                     help="Run only the items of shard i out of N e.g. 2/5"),
+        click.option('--shell-pool', type=int, required=False,
+                     help="Run commands on this many long lived shells instead of a new shell each"),
+        click.option('--stats', is_flag=True, default=False,
+                     help="Report run statistics at the end")
+    ]
+
+    for option in reversed(options):
+        command = option(command)
+
+    return command
+
+
+def _init_from_file(file, item, concurrency, per_host, type_limit, shard, shell_pool, stats,
+                    **cli_settings):
+    """Reads the yaml file and initializes janch with it
+
+    Returns: bool whether the selected items were found
+
+    """
     context_dict = yaml.load(file.read(), Loader=yaml.SafeLoader)
 
     # import json
     # print(json.dumps(context_dict))
 
+    file_settings = context_dict.pop(SETTINGS_KEY, None) or {}
+
+    cli_settings = {k: v for k, v in cli_settings.items() if v is not None}
+    concurrency_settings = _concurrency_settings(concurrency, per_host, type_limit)
+    if concurrency_settings:
+        cli_settings['concurrency'] = concurrency_settings
+    if shell_pool is not None:
+        cli_settings['shells'] = {'size': shell_pool}
+    if stats:
+        cli_settings['stats'] = True
+
     if item:
         selected_item = {item: context_dict.get(item)} if item in context_dict else None
     else:
         selected_item = context_dict
 
-    if selected_item:
+    if not selected_item:
+        click.echo(f"Item {item} not found")
+        return False
+
+    if shard:
+        try:
+            index, count = sharding.parse(shard)
+        except ValueError as e:
+            raise click.BadParameter(str(e), param_hint='--shard')
+
+        total = len(selected_item)
+        selected_item = sharding.select(selected_item, index, count)
+        click.echo(f"shard {index}/{count} runs {len(selected_item)} of {total} items")
+
+        if not selected_item:
+            return False
+
+    try:
         init(selected_item
-             , dotenv_values(dotenv_path))
+             , dotenv_values(dotenv_path)
+             , settings=_merge_settings(file_settings, cli_settings))
+    except ValueError as e:
+        raise click.ClickException(str(e))
+
+    return True
+
+
+@main.command()
+@click.option('--deadline', type=float, required=False,
+              help="Seconds after which items still running are cancelled and reported as timed out")
+@click.option('--workers', type=int, required=False,
+              help="Number of processes to split the items across")
+@_common_options
+def run(deadline, workers, **options):
+    """Run janch using a defined yaml file"""
+    if _init_from_file(deadline=deadline, workers=workers, **options):
         start()
     else:
-        click.echo(f"Item {item} not found")
+        exit()
+
+
+@main.command()
+@click.option('--interval', type=float, required=False,
+              help="Seconds between runs of items that do not set their own interval")
+@click.option('--jitter', type=float, required=False,
+              help="Fraction of the interval by which each run is randomly moved e.g. 0.1")
+@_common_options
+def watch(interval, jitter, **options):
+    """Keep running the items of a yaml file, each on its own interval"""
+    if _init_from_file(interval=interval, jitter=jitter, **options):
+        try:
+            start_watching()
+        except KeyboardInterrupt:
+            pass
+    else:
         exit()
 
 
@@ -99,6 +219,15 @@ def loggers():
     click.echo(body)
 
 
+@utils.command()
+def caches():
+    """Show information about all the caches"""
+    type_and_class = get_all_caches()
+    header, body = _utils_info_prep(type_and_class)
+    click.echo(header)
+    click.echo(body)
+
+
 @utils.command()
 def formatters():
     """Show information about all the formatters"""
@@ -0,0 +1,207 @@
+"""Caches keep gathered data so that items with a cache_ttl do not gather again until it expires
+
+"""
+import json
+import os
+import sqlite3
+import time
+from abc import ABC
+from collections import OrderedDict
+
+from janch.utils.constants import DEFAULT_CACHE_SIZE, DEFAULT_CACHE_PATH
+
+
+class Cache(ABC):
+    """Abstract base class for a cache. You can implement a custom cache by extending
+    this class and overriding the methods
+    """
+
+    def __init__(self, settings: dict = None):
+        """Pass the dict form of the cache section from the run settings
+
+        Args:
+            settings: dict
+        """
+        self.settings = settings or {}
+
+    @staticmethod
+    def type() -> str:
+        """This is the string that identifies the specific cache
+
+        Returns: str
+
+        """
+        raise NotImplementedError("Specify a type for this cache")
+
+    async def get(self, key: str):
+        """Returns the value stored under the key unless it has expired
+
+        Args:
+            key: str
+
+        Returns: the value or None
+
+        """
+        raise NotImplementedError("Return the value stored under the key")
+
+    async def set(self, key: str, value, ttl: float):
+        """Store the value under the key for ttl seconds
+
+        Args:
+            key: str
+            value: json serializable value
+            ttl: float seconds
+
+        Returns:
+
+        """
+        raise NotImplementedError("Store the value under the key")
+
+    async def close(self):
+        """Release whatever the cache holds on to
+
+        Returns:
+
+        """
+
+
+class MemoryCache(Cache):
+    """Least recently used cache kept in memory, suited to watch mode"""
+
+    def __init__(self, settings: dict = None):
+        super().__init__(settings)
+        self.size = self.settings.get('size', DEFAULT_CACHE_SIZE)
+        self._entries = OrderedDict()
+
+    @staticmethod
+    def type() -> str:
+        """Return 'memory'
+
+        Returns: str
+
+        """
+        return 'memory'
+
+    async def get(self, key):
+        """Returns the value and marks it as recently used
+
+        Args:
+            key: str
+
+        Returns: the value or None
+
+        """
+        entry = self._entries.get(key)
+
+        if entry is None:
+            return None
+
+        expires, value = entry
+
+        if expires < time.time():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+
+        return value
+
+    async def set(self, key, value, ttl):
+        """Stores the value, evicting the least recently used values beyond the size
+
+        Args:
+            key: str
+            value: any value
+            ttl: float seconds
+
+        Returns:
+
+        """
+        self._entries[key] = (time.time() + ttl, value)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.size:
+            self._entries.popitem(last=False)
+
+
+class SqliteCache(Cache):
+    """Cache stored in a sqlite file, shared between separate runs of janch"""
+
+    def __init__(self, settings: dict = None):
+        super().__init__(settings)
+        self.path = os.path.expanduser(self.settings.get('path', DEFAULT_CACHE_PATH))
+        self._connection = None
+
+    @staticmethod
+    def type() -> str:
+        """Return 'sqlite'
+
+        Returns: str
+
+        """
+        return 'sqlite'
+
+    def _connect(self):
+        if self._connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            self._connection = sqlite3.connect(self.path, timeout=5)
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, expires REAL, value TEXT)')
+
+        return self._connection
+
+    async def get(self, key):
+        """Reads the value from the file
+
+        Args:
+            key: str
+
+        Returns: the value or None
+
+        """
+        row = self._connect().execute(
+            'SELECT value FROM cache WHERE key = ? AND expires >= ?', (key, time.time())).fetchone()
+
+        return json.loads(row[0]) if row else None
+
+    async def set(self, key, value, ttl):
+        """Writes the value to the file as JSON
+
+        Args:
+            key: str
+            value: json serializable value. Anything else is stored as str
+            ttl: float seconds
+
+        Returns:
+
+        """
+        connection = self._connect()
+
+        with connection:
+            connection.execute('DELETE FROM cache WHERE expires < ?', (time.time(),))
+            connection.execute('INSERT OR REPLACE INTO cache VALUES (?, ?, ?)',
+                               (key, time.time() + ttl, json.dumps(value, default=str)))
+
+    async def close(self):
+        """Closes the connection to the file
+
+        Returns:
+
+        """
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+def get_default_caches():
+    """Returns all caches with the cache type/id as key
+
+    Returns: dict[str: Cache]
+
+    """
+    caches = [MemoryCache, SqliteCache]
+
+    return {c.type(): c for c in caches}
@@ -1,20 +1,53 @@
 """Gatherers are classes that collect the data from various sources
 """
 import asyncio
+import hashlib
+import os
+import re
+import signal
+import socket
+import sqlite3
+import stat
 from abc import ABC
 
 import aiohttp
 
-from janch.utils.constants import NO_ERROR
+try:
+    import grp
+    import pwd
+except ImportError:
+    grp = pwd = None
+
+from janch.utils import sessions, stats, grep, store, shells, capture, procfs, resolver, \
+    databases
+from janch.utils.capture import Capture
+from janch.utils.constants import NO_ERROR, DEFAULT_MAX_BODY_BYTES, DEFAULT_VALIDATOR_TTL, \
+    DEFAULT_GREP_POSITION_TTL, DEFAULT_MAX_OUTPUT_BYTES, DEFAULT_CPU_SAMPLE_SECONDS, \
+    DEFAULT_BANNER_BYTES, DEFAULT_BANNER_SECONDS, DEFAULT_QUERY_TIMEOUT, DEFAULT_HASH_INDEX_TTL, \
+    DEFAULT_HASH_CHUNK_SIZE, DEFAULT_DRAIN_BYTES
 
 
 class Gatherer(ABC):
     """Abstract base class for all Gatherer classes
     """
 
+    # The output fields that will be inspected, set by the engine. None means all of them
+    fields = None
+
     def __init__(self, settings):
         self.settings = settings
 
+    def wants(self, field: str) -> bool:
+        """Whether an output field will be used. Gatherers can skip fields that are expensive
+
+        Args:
+            field: str name of an output field
+
+        Returns: bool
+
+        """
+        return self.fields is None or field in self.fields
+
     @staticmethod
     def get_input_fields() -> list:
         """The list of fields needed for this gatherer to work
@@ -53,19 +86,43 @@ class Gatherer(ABC):
         """
         raise NotImplementedError("Should use the args to gather")
 
-    async def gather(self):
-        """This method prepares the parameters for the main method
+    @classmethod
+    async def gather_many(cls, settings_list: list) -> list:
+        """Gather for several items at once
 
-        This method need not be overridden
+        Gatherers whose backend is cheaper to call once for many items, such as a single pass
+        over a file, override this. The engine then hands it the settings of all the items of
+        this type that are waiting to be gathered together. Use finish on each gathered dict.
+        Gatherers created here gather every output field. By default each item is gathered on
+        its own
+
+        Args:
+            settings_list: list of dict gather sections of the items
+
+        Returns: list of dict, one for each item in the same order
+
+        """
+        return list(await asyncio.gather(*[cls(settings).gather() for settings in settings_list]))
+
+    @classmethod
+    def gathers_many(cls) -> bool:
+        """Whether the gatherer overrides gather_many
+
+        Returns: bool
+
+        """
+        return cls.gather_many.__func__ is not Gatherer.gather_many.__func__
+
+    def finish(self, gathered: dict) -> dict:
+        """Checks the gathered fields and marks the absence of an error
+
+        Args:
+            gathered: dict returned by main
 
         Returns: dict
 
         """
-        params = [self.settings[p] for p in self.get_input_fields()]
         output = self.get_output_fields()
-        method = self.main
-
-        gathered = await method(*params)
 
         for k, v in gathered.items():
             assert k in output
@@ -75,10 +132,30 @@ class Gatherer(ABC):
 
         return gathered
 
+    async def gather(self):
+        """This method prepares the parameters for the main method
+
+        This method need not be overridden
+
+        Returns: dict
+
+        """
+        params = [self.settings[p] for p in self.get_input_fields()]
+        method = self.main
+
+        gathered = await method(*params)
+
+        return self.finish(gathered)
+
 
 class HttpGatherer(Gatherer):
     """Gather information from a http(s) source
 
+    The body is only kept when the html field is inspected, and then at most max_body_bytes
+    of it. Otherwise only a small body is read, so that the connection can be reused. With
+    revalidate set, the ETag and Last-Modified of the response are remembered and sent with
+    the next request so that an unchanged resource is answered with just headers. The time
+    taken by each phase of the request is gathered in milliseconds
     """
 
     @staticmethod
@@ -101,16 +178,20 @@ class HttpGatherer(Gatherer):
 
     @staticmethod
     def get_output_fields():
-        """The output fields ['status', 'headers', 'html', 'error']
+        """The output fields ['status', 'headers', 'html', 'truncated', 'not_modified', 'dns_ms',
+        'connect_ms', 'tls_ms', 'ttfb_ms', 'total_ms', 'body_bytes', 'error']
 
         Returns: list
 
         """
-        return ['status', 'headers', 'html', 'error']
+        return ['status', 'headers', 'html', 'truncated', 'not_modified', 'dns_ms', 'connect_ms',
+                'tls_ms', 'ttfb_ms', 'total_ms', 'body_bytes', 'error']
 
     async def main(self, url):
         """Makes a request to the url
 
+        Uses the session shared by the run when there is one, otherwise a session of its own
+
         Args:
             url: str The http(s) which needs to be requested
 
@@ -122,11 +203,14 @@ class HttpGatherer(Gatherer):
         ret = {'error': None}
 
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, ssl=False) as response:
-                    ret['status'] = response.status
-                    ret['headers'] = str(response.headers)
-                    ret['html'] = str(await response.text())
+            session = sessions.get_session()
+
+            if session:
+                await self._request(session, url, ret)
+            else:
+                async with aiohttp.ClientSession(trace_configs=[sessions.get_trace_config()]) \
+                        as session:
+                    await self._request(session, url, ret)
         except Exception as e:
             ex_type, ex_value, ex_traceback = sys.exc_info()
 
@@ -134,10 +218,86 @@ class HttpGatherer(Gatherer):
 
         return ret
 
+    async def _request(self, session, url, ret):
+        validators = store.get_store() if self.settings.get('revalidate') else None
+        key = f"validators|{url}|{self.wants('html')}"
+        known = await validators.get(key) if validators else None
+
+        headers = {}
+        if known and known['etag']:
+            headers['If-None-Match'] = known['etag']
+        if known and known['last_modified']:
+            headers['If-Modified-Since'] = known['last_modified']
+
+        timings = sessions.Timings()
+
+        async with session.get(url, ssl=False, headers=headers, trace_request_ctx=timings) \
+                as response:
+            if known and response.status == 304:
+                stats.incr('http.not_modified')
+                ret.update(known['gathered'])
+                ret['not_modified'] = True
+                timings.mark('end')
+                ret.update(timings.as_fields())
+                return
+
+            ret['status'] = response.status
+            ret['headers'] = {k: ', '.join(response.headers.getall(k))
+                              for k in response.headers.keys()}
+
+            if self.wants('html'):
+                limit = self.settings.get('max_body_bytes', DEFAULT_MAX_BODY_BYTES)
+                body, ret['truncated'] = await HttpGatherer._read(response, limit)
+                ret['html'] = body.decode(response.charset or 'utf-8', errors='replace')
+                ret['body_bytes'] = len(body)
+            else:
+                # The body is not read, so its size is only known when the server tells it.
+                # A small one is read and dropped so that the connection can be reused
+                ret['body_bytes'] = response.content_length
+
+                if (response.content_length or 0) <= DEFAULT_DRAIN_BYTES:
+                    body, truncated = await HttpGatherer._read(response, DEFAULT_DRAIN_BYTES)
+                    if not truncated:
+                        ret['body_bytes'] = len(body)
+
+            timings.mark('end')
+            ret.update(timings.as_fields())
+
+            if validators:
+                ret['not_modified'] = False
+                etag = response.headers.get('ETag')
+                last_modified = response.headers.get('Last-Modified')
+
+                if response.status == 200 and (etag or last_modified):
+                    gathered = {k: v for k, v in ret.items() if k != 'error'}
+                    await validators.set(key, {'etag': etag,
+                                               'last_modified': last_modified,
+                                               'gathered': gathered}, DEFAULT_VALIDATOR_TTL)
+
+    @staticmethod
+    async def _read(response, limit):
+        """Reads the body in chunks, stopping once limit bytes have been read
+
+        Returns: bytes, bool whether the body was cut short
+
+        """
+        body = bytearray()
+
+        async for chunk in response.content.iter_chunked(64 * 1024):
+            body.extend(chunk)
+
+            if len(body) > limit:
+                return bytes(body[:limit]), True
+
+        return bytes(body), False
+
 
 class CommandGatherer(Gatherer):
     """Execute a shell command
 
+    When the run has a pool of shells the command is run on one of them instead of a new shell.
+    Output is read as it is written and only the first and last max_output_bytes / 2 of it are
+    kept. With stop_on, the command is stopped once its output matches that regular expression
     """
 
     @staticmethod
@@ -159,22 +319,89 @@ class CommandGatherer(Gatherer):
         :param args:
         :return:
         """
+        stdout, stderr, returncode = await CommandGatherer.execute(shell, *args)
+
+        return stdout.decode(), stderr.decode() if stderr and stderr.size else None
 
-        # Create subprocess
+    @staticmethod
+    async def execute(shell=False, *args, max_bytes: int = None, stop_on: str = None):
+        """Run a command in a new process like run_command, reading its output as it is
+        written so that at most max_bytes of each of stdout and stderr are held
+
+        Args:
+            shell: bool whether args[0] is a shell command instead of a program and its args
+            *args: str
+            max_bytes: int maximum number of bytes of each of stdout and stderr that are kept.
+                Unbounded when None
+            stop_on: str regular expression after a match of which in stdout the command is
+                killed
+
+        Returns: tuple of stdout Capture, stderr Capture or None and int exit status, which is
+            None when the command was stopped
+
+        """
+
+        # Create subprocess. A session of its own lets the whole process group be killed
         if shell:
             process = await asyncio.create_subprocess_shell(
                 args[0],
                 stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE)
+                stderr=asyncio.subprocess.PIPE,
+                start_new_session=True)
         else:
             process = await asyncio.create_subprocess_exec(
                 *args,
                 # stdout must a pipe to be accessible as process.stdout
-                stdout=asyncio.subprocess.PIPE)
-        # Wait for the subprocess to finish
-        stdout, stderr = await process.communicate()
-        # Return stdout
-        return stdout.decode().strip(), stderr.decode().strip() if stderr else None
+                stdout=asyncio.subprocess.PIPE,
+                start_new_session=True)
+        stdout = Capture(max_bytes, stop_on)
+        stderr = Capture(max_bytes) if process.stderr else None
+        # Both pipes are read together so that a command filling one of them cannot block
+        reading_stderr = asyncio.ensure_future(capture.read(process.stderr, stderr)) \
+            if stderr else None
+
+        # Wait for the output to end, or to match stop_on, and then for the subprocess
+        try:
+            await capture.read(process.stdout, stdout)
+
+            if stdout.stopped:
+                await CommandGatherer.kill(process)
+                return stdout, stderr, None
+
+            if reading_stderr:
+                await reading_stderr
+            await process.wait()
+        except asyncio.CancelledError:
+            await CommandGatherer.kill(process)
+            raise
+        finally:
+            if reading_stderr:
+                reading_stderr.cancel()
+
+        return stdout, stderr, process.returncode
+
+    @staticmethod
+    async def kill(process):
+        """Kill a process started by run_command along with anything it started
+
+        Args:
+            process: asyncio.subprocess.Process
+
+        Returns:
+
+        """
+        if process.returncode is not None:
+            return
+
+        try:
+            if hasattr(os, 'killpg'):
+                os.killpg(process.pid, signal.SIGKILL)
+            else:
+                process.kill()
+        except ProcessLookupError:
+            pass
+
+        await process.wait()
 
     @staticmethod
     def get_input_fields():
@@ -187,12 +414,12 @@ class CommandGatherer(Gatherer):
 
     @staticmethod
     def get_output_fields():
-        """The output fields ['result', 'error']
+        """The output fields ['result', 'exit_status', 'truncated', 'output_bytes', 'error']
 
         Returns: list
 
         """
-        return ['result', 'error']
+        return ['result', 'exit_status', 'truncated', 'output_bytes', 'error']
 
     async def main(self, command_str):
         """Executes the command
@@ -203,17 +430,38 @@ class CommandGatherer(Gatherer):
         Returns: dict
 
         """
-        output, error = await CommandGatherer.run_command(True, *[command_str])
+        pool = shells.get_pool()
+        max_bytes = self.settings.get('max_output_bytes', DEFAULT_MAX_OUTPUT_BYTES)
+        stop_on = self.settings.get('stop_on')
+
+        if pool:
+            stdout, stderr, status = await pool.run(command_str, max_bytes, stop_on)
+        else:
+            stdout, stderr, status = await CommandGatherer.execute(
+                True, *[command_str], max_bytes=max_bytes, stop_on=stop_on)
+
+        if stdout.stopped:
+            stats.incr('command.stopped')
 
         return {
-            'result': output,
-            'error': error
+            'result': stdout.decode(),
+            'exit_status': status,
+            'truncated': stdout.truncated,
+            'output_bytes': stdout.size,
+            'error': stderr.decode() if stderr else None
         }
 
 
 class GrepGatherer(Gatherer):
-    """Execute a grep command
+    """Search a file for lines matching a regular expression
 
+    The file is memory mapped and scanned in a thread instead of running the grep command.
+    The search is a Python regular expression. Set max_lines to limit the lines returned.
+
+    With incremental set, only lines appended since the previous run are searched and their
+    number is gathered as new_match_count. The position reached is kept in the cache.
+
+    Items searching the same file are searched together in a single pass over the file
     """
 
     @staticmethod
@@ -236,12 +484,12 @@ class GrepGatherer(Gatherer):
 
     @staticmethod
     def get_output_fields():
-        """The output fields ['result', 'line_count', 'error']
+        """The output fields ['result', 'line_count', 'new_match_count', 'error']
 
         Returns: list
 
         """
-        return ['result', 'line_count', 'error']
+        return ['result', 'line_count', 'new_match_count', 'error']
 
     async def main(self, filepath, search):
         """Greps the file in the filepath with the search string
@@ -253,16 +501,682 @@ class GrepGatherer(Gatherer):
         Returns: dict
 
         """
-        output, error = await CommandGatherer.run_command(False, *['grep', search, filepath])
+        if self.settings.get('incremental'):
+            return await self._search_appended(filepath, search)
+
+        loop = asyncio.get_running_loop()
+
+        try:
+            pattern = grep.compile(search)
+            lines, count = await loop.run_in_executor(
+                None, grep.search_file, filepath, pattern, self.settings.get('max_lines'))
+        except (OSError, re.error) as e:
+            return {'result': '', 'line_count': 0, 'error': str(e)}
+
+        ret = {
+            'result': '\n'.join(lines),
+            'line_count': count,
+            'error': None
+        }
+
+        return ret
+
+    @classmethod
+    async def gather_many(cls, settings_list: list) -> list:
+        """Search each file once for the patterns of all the items that search it
+
+        Incremental items keep their own position in the file and are searched on their own
+
+        Args:
+            settings_list: list of dict gather sections of grep items
+
+        Returns: list of dict
+
+        """
+        ret = [None] * len(settings_list)
+        files = {}
+        alone = []
+
+        for i, settings in enumerate(settings_list):
+            if settings.get('incremental'):
+                alone.append(i)
+            else:
+                files.setdefault(os.path.abspath(settings['filepath']), []).append(i)
+
+        async def search_alone(i):
+            ret[i] = await cls(settings_list[i]).gather()
+
+        async def search_together(indexes):
+            found = await cls._search_together([cls(settings_list[i]) for i in indexes])
+            for i, gathered in zip(indexes, found):
+                ret[i] = gathered
+
+        await asyncio.gather(*[search_alone(i) for i in alone],
+                             *[search_together(indexes) for indexes in files.values()])
+
+        return ret
+
+    @staticmethod
+    async def _search_together(gatherers: list) -> list:
+        loop = asyncio.get_running_loop()
+        ret = [None] * len(gatherers)
+        searches = []
+
+        for i, gatherer in enumerate(gatherers):
+            try:
+                searches.append((i, grep.compile(gatherer.settings['search'])))
+            except re.error as e:
+                ret[i] = {'result': '', 'line_count': 0, 'error': str(e)}
+
+        try:
+            found = await loop.run_in_executor(
+                None, grep.search_file_many, gatherers[0].settings['filepath'],
+                [pattern for i, pattern in searches],
+                [gatherers[i].settings.get('max_lines') for i, pattern in searches])
+        except OSError as e:
+            found = [([], 0, str(e)) for _ in searches]
+
+        for (i, pattern), (lines, count, *error) in zip(searches, found):
+            ret[i] = {
+                'result': '\n'.join(lines),
+                'line_count': count,
+                'error': error[0] if error else None
+            }
+
+        return [gatherer.finish(gathered) for gatherer, gathered in zip(gatherers, ret)]
+
+    async def _search_appended(self, filepath, search):
+        loop = asyncio.get_running_loop()
+        positions = store.get_state()
+        key = f"grep|{os.path.abspath(filepath)}|{search}"
+
+        try:
+            pattern = grep.compile(search)
+            position = await positions.get(key) if positions else None
+            lines, count, position = await loop.run_in_executor(
+                None, grep.search_appended, filepath, pattern, position,
+                self.settings.get('max_lines'))
+        except (OSError, re.error) as e:
+            return {'result': '', 'line_count': 0, 'new_match_count': 0, 'error': str(e)}
+
+        if positions:
+            await positions.set(key, position, DEFAULT_GREP_POSITION_TTL)
+
+        return {
+            'result': '\n'.join(lines),
+            'line_count': count,
+            'new_match_count': count,
+            'error': None
+        }
+
+
+class TcpGatherer(Gatherer):
+    """Check that a tcp port accepts connections
+
+    The connection is opened without a new process and the time it took is gathered. With
+    banner set, up to banner_bytes of what the server sends first are read, waiting at most
+    banner_seconds for them. Many tcp items run at once within the concurrency limits of the
+    run, including the per host limit
+    """
+
+    @staticmethod
+    def type():
+        """The TcpGatherer type
+
+        Returns: str tcp
+
+        """
+        return "tcp"
+
+    @staticmethod
+    def get_input_fields():
+        """The input fields ['host', 'port']
+
+        Returns: list
+
+        """
+        return ['host', 'port']
+
+    @staticmethod
+    def get_output_fields():
+        """The output fields ['connected', 'connect_ms', 'banner', 'error']
+
+        Returns: list
+
+        """
+        return ['connected', 'connect_ms', 'banner', 'error']
+
+    async def main(self, host, port):
+        """Connects to the port
+
+        Args:
+            host: str host name or address
+            port: int
+
+        Returns: dict
+
+        """
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+
+        try:
+            reader, writer = await asyncio.open_connection(host, int(port))
+        except (OSError, ValueError) as e:
+            return {'connected': False, 'connect_ms': None, 'error': str(e) or repr(e)}
 
         ret = {
-            'result': output,
-            'line_count': output.count('\n') + 1,
-            'error': error
+            'connected': True,
+            'connect_ms': round((loop.time() - started) * 1000, 3),
+            'error': None
         }
 
+        try:
+            if self.settings.get('banner'):
+                ret['banner'] = await self._read_banner(reader)
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+
         return ret
 
+    async def _read_banner(self, reader) -> str:
+        limit = self.settings.get('banner_bytes', DEFAULT_BANNER_BYTES)
+        seconds = self.settings.get('banner_seconds', DEFAULT_BANNER_SECONDS)
+
+        try:
+            banner = await asyncio.wait_for(reader.read(limit), seconds)
+        except (asyncio.TimeoutError, OSError):
+            # Servers that wait for the client to speak first send no banner
+            banner = b''
+
+        return banner.decode(errors='replace').strip()
+
+
+class DnsGatherer(Gatherer):
+    """Resolve a host name to its addresses
+
+    Set family to 4 or 6 to only resolve addresses of that version. Lookups go through the
+    resolver of the run, which the http items of the run use as well
+    """
+
+    FAMILIES = {4: socket.AF_INET, 6: socket.AF_INET6}
+
+    @staticmethod
+    def type():
+        """The DnsGatherer type
+
+        Returns: str dns
+
+        """
+        return "dns"
+
+    @staticmethod
+    def get_input_fields():
+        """The input fields ['name']
+
+        Returns: list
+
+        """
+        return ['name']
+
+    @staticmethod
+    def get_output_fields():
+        """The output fields ['addresses', 'address_count', 'lookup_ms', 'cached', 'error']
+
+        Returns: list
+
+        """
+        return ['addresses', 'address_count', 'lookup_ms', 'cached', 'error']
+
+    async def main(self, name):
+        """Looks up the name
+
+        Args:
+            name: str host name
+
+        Returns: dict
+
+        """
+        loop = asyncio.get_running_loop()
+        family = DnsGatherer.FAMILIES.get(self.settings.get('family'), socket.AF_UNSPEC)
+        lookups = resolver.get_resolver() or resolver.Resolver(0)
+        started = loop.time()
+
+        try:
+            found, cached = await lookups.lookup(name, family)
+        except (OSError, UnicodeError) as e:
+            return {'addresses': [], 'address_count': 0, 'error': str(e)}
+
+        addresses = sorted({address for _, _, address in found})
+
+        return {
+            'addresses': addresses,
+            'address_count': len(addresses),
+            'lookup_ms': round((loop.time() - started) * 1000, 3),
+            'cached': cached,
+            'error': None
+        }
+
+
+class DbGatherer(Gatherer):
+    """Run a query against a database
+
+    The dsn selects the database, e.g. sqlite:///data/app.db. Queries of a run share a pool of
+    connections for each dsn and are interrupted after query_timeout seconds
+    """
+
+    @staticmethod
+    def type():
+        """The DbGatherer type
+
+        Returns: str db
+
+        """
+        return "db"
+
+    @staticmethod
+    def get_input_fields():
+        """The input fields ['dsn', 'query']
+
+        Returns: list
+
+        """
+        return ['dsn', 'query']
+
+    @staticmethod
+    def get_output_fields():
+        """The output fields ['row_count', 'first_row', 'error']
+
+        Returns: list
+
+        """
+        return ['row_count', 'first_row', 'error']
+
+    async def main(self, dsn, query):
+        """Runs the query
+
+        Args:
+            dsn: str
+            query: str
+
+        Returns: dict
+
+        """
+        timeout = self.settings.get('query_timeout', DEFAULT_QUERY_TIMEOUT)
+
+        try:
+            pool = databases.get_pool(dsn)
+            # Without a run the connection is opened for this query alone
+            own_pool = databases.ConnectionPool(dsn, 1) if pool is None else None
+
+            try:
+                columns, first, count = await (pool or own_pool).query(query, timeout)
+            finally:
+                if own_pool:
+                    await own_pool.close()
+        except asyncio.TimeoutError:
+            return {'error': f"Query did not finish within {timeout} seconds"}
+        except (sqlite3.Error, ValueError) as e:
+            return {'error': str(e)}
+
+        return {
+            'row_count': count,
+            'first_row': dict(zip(columns, first)) if first is not None else None,
+            'error': None
+        }
+
+
+class FileGatherer(Gatherer):
+    """Gather the size, modification time, permissions and owner of a file
+
+    With hash set to the name of a hashlib algorithm, or to true for sha256, the content is
+    hashed in a thread. The hash is kept in the cache along with the size and modification
+    time of the file, so an unchanged file is not hashed again in later runs
+    """
+
+    @staticmethod
+    def type():
+        """The FileGatherer type
+
+        Returns: str file
+
+        """
+        return "file"
+
+    @staticmethod
+    def get_input_fields():
+        """The input fields ['path']
+
+        Returns: list
+
+        """
+        return ['path']
+
+    @staticmethod
+    def get_output_fields():
+        """The output fields ['exists', 'size', 'mtime', 'mode', 'permissions', 'owner', 'group',
+        'hash', 'error']
+
+        Returns: list
+
+        """
+        return ['exists', 'size', 'mtime', 'mode', 'permissions', 'owner', 'group', 'hash',
+                'error']
+
+    async def main(self, path):
+        """Reads the status of the file
+
+        Args:
+            path: str
+
+        Returns: dict
+
+        """
+        try:
+            status = os.stat(path)
+        except FileNotFoundError:
+            return {'exists': False, 'error': None}
+        except OSError as e:
+            return {'error': str(e)}
+
+        ret = {
+            'exists': True,
+            'size': status.st_size,
+            'mtime': status.st_mtime,
+            'mode': f"{stat.S_IMODE(status.st_mode):04o}",
+            'permissions': stat.filemode(status.st_mode),
+            'owner': FileGatherer._owner(status.st_uid),
+            'group': FileGatherer._group(status.st_gid),
+            'error': None
+        }
+
+        algorithm = self.settings.get('hash')
+        if algorithm:
+            try:
+                ret['hash'] = await self._hash(path, status,
+                                               'sha256' if algorithm is True else algorithm)
+            except (OSError, ValueError) as e:
+                ret['error'] = str(e)
+
+        return ret
+
+    # Unknown ids, or systems without pwd and grp, give the number
+    @staticmethod
+    def _owner(uid):
+        try:
+            return pwd.getpwuid(uid).pw_name
+        except (AttributeError, KeyError):
+            return str(uid)
+
+    @staticmethod
+    def _group(gid):
+        try:
+            return grp.getgrgid(gid).gr_name
+        except (AttributeError, KeyError):
+            return str(gid)
+
+    async def _hash(self, path, status, algorithm):
+        index = store.get_state()
+        key = f"hash|{algorithm}|{os.path.abspath(path)}"
+        signature = [status.st_size, status.st_mtime_ns]
+        known = await index.get(key) if index else None
+
+        if known and known['signature'] == signature:
+            stats.incr('file.hash_reused')
+            return known['hash']
+
+        loop = asyncio.get_running_loop()
+        digest = await loop.run_in_executor(None, FileGatherer._digest, path, algorithm)
+        stats.incr('file.hashed')
+
+        if index:
+            await index.set(key, {'signature': signature, 'hash': digest}, DEFAULT_HASH_INDEX_TTL)
+
+        return digest
+
+    @staticmethod
+    def _digest(path, algorithm):
+        hasher = hashlib.new(algorithm)
+
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(DEFAULT_HASH_CHUNK_SIZE), b''):
+                hasher.update(chunk)
+
+        return hasher.hexdigest()
+
+
+class CpuGatherer(Gatherer):
+    """Gather how busy the cpus are from /proc/stat
+
+    /proc/stat holds the time spent since boot, so it is read twice, sample_seconds apart.
+    Items with the same sample_seconds share the same sample
+    """
+
+    @staticmethod
+    def type():
+        """The CpuGatherer type
+
+        Returns: str cpu
+
+        """
+        return "cpu"
+
+    @staticmethod
+    def get_input_fields():
+        """No input fields are needed
+
+        Returns: list
+
+        """
+        return []
+
+    @staticmethod
+    def get_output_fields():
+        """The output fields ['usage_percent', 'iowait_percent', 'cpu_count', 'error']
+
+        Returns: list
+
+        """
+        return ['usage_percent', 'iowait_percent', 'cpu_count', 'error']
+
+    async def main(self):
+        """Samples the cpu times
+
+        Returns: dict
+
+        """
+        seconds = self.settings.get('sample_seconds', DEFAULT_CPU_SAMPLE_SECONDS)
+
+        try:
+            return await procfs.cpu_usage(seconds)
+        except (OSError, ValueError) as e:
+            return {'error': str(e)}
+
+
+class MemoryGatherer(Gatherer):
+    """Gather memory and swap usage from /proc/meminfo
+
+    Available memory is the kernel's estimate of what can be used without swapping
+    """
+
+    @staticmethod
+    def type():
+        """The MemoryGatherer type
+
+        Returns: str memory
+
+        """
+        return "memory"
+
+    @staticmethod
+    def get_input_fields():
+        """No input fields are needed
+
+        Returns: list
+
+        """
+        return []
+
+    @staticmethod
+    def get_output_fields():
+        """The output fields ['total_bytes', 'available_bytes', 'used_percent',
+        'swap_total_bytes', 'swap_used_percent', 'error']
+
+        Returns: list
+
+        """
+        return ['total_bytes', 'available_bytes', 'used_percent', 'swap_total_bytes',
+                'swap_used_percent', 'error']
+
+    async def main(self):
+        """Reads /proc/meminfo
+
+        Returns: dict
+
+        """
+        try:
+            meminfo = procfs.parse_meminfo(await procfs.read_file('/proc/meminfo'))
+            total = meminfo['MemTotal']
+            available = meminfo.get('MemAvailable')
+        except (OSError, KeyError) as e:
+            return {'error': f"Could not read memory usage: {e}"}
+
+        # Kernels older than 3.14 do not estimate the available memory
+        if available is None:
+            available = sum(meminfo.get(k, 0) for k in ('MemFree', 'Buffers', 'Cached'))
+
+        swap_total = meminfo.get('SwapTotal', 0)
+        swap_used = swap_total - meminfo.get('SwapFree', 0)
+
+        return {
+            'total_bytes': total,
+            'available_bytes': available,
+            'used_percent': round((total - available) * 100 / total, 2) if total else 0.0,
+            'swap_total_bytes': swap_total,
+            'swap_used_percent': round(swap_used * 100 / swap_total, 2) if swap_total else 0.0,
+            'error': None
+        }
+
+
+class LoadGatherer(Gatherer):
+    """Gather the load averages from /proc/loadavg
+
+    """
+
+    @staticmethod
+    def type():
+        """The LoadGatherer type
+
+        Returns: str load
+
+        """
+        return "load"
+
+    @staticmethod
+    def get_input_fields():
+        """No input fields are needed
+
+        Returns: list
+
+        """
+        return []
+
+    @staticmethod
+    def get_output_fields():
+        """The output fields ['load_1', 'load_5', 'load_15', 'processes', 'error']
+
+        Returns: list
+
+        """
+        return ['load_1', 'load_5', 'load_15', 'processes', 'error']
+
+    async def main(self):
+        """Reads /proc/loadavg
+
+        Returns: dict
+
+        """
+        try:
+            load_1, load_5, load_15, processes = \
+                (await procfs.read_file('/proc/loadavg')).split()[:4]
+
+            return {
+                'load_1': float(load_1),
+                'load_5': float(load_5),
+                'load_15': float(load_15),
+                'processes': int(processes.partition('/')[2]),
+                'error': None
+            }
+        except (OSError, ValueError) as e:
+            return {'error': f"Could not read load averages: {e}"}
+
+
+class DiskGatherer(Gatherer):
+    """Gather the space and inodes left on the file system holding a path
+
+    Free space is what is available to users other than root
+    """
+
+    @staticmethod
+    def type():
+        """The DiskGatherer type
+
+        Returns: str disk
+
+        """
+        return "disk"
+
+    @staticmethod
+    def get_input_fields():
+        """The input fields ['path']
+
+        Returns: list
+
+        """
+        return ['path']
+
+    @staticmethod
+    def get_output_fields():
+        """The output fields ['total_bytes', 'free_bytes', 'used_percent', 'inodes_used_percent',
+        'error']
+
+        Returns: list
+
+        """
+        return ['total_bytes', 'free_bytes', 'used_percent', 'inodes_used_percent', 'error']
+
+    async def main(self, path):
+        """Reads the statistics of the file system
+
+        Args:
+            path: str any path on the file system
+
+        Returns: dict
+
+        """
+        try:
+            result = await procfs.statvfs(path)
+        except OSError as e:
+            return {'error': str(e)}
+
+        total = result.f_blocks * result.f_frsize
+        free = result.f_bavail * result.f_frsize
+        # Space reserved for root counts as used, as df does
+        used = (result.f_blocks - result.f_bfree) * result.f_frsize
+        inodes_used = result.f_files - result.f_ffree
+
+        return {
+            'total_bytes': total,
+            'free_bytes': free,
+            'used_percent': round(used * 100 / (used + free), 2) if used + free else 0.0,
+            'inodes_used_percent':
+                round(inodes_used * 100 / result.f_files, 2) if result.f_files else 0.0,
+            'error': None
+        }
+
 
 def get_default_gatherers():
     """Returns all the gatherers as dict
@@ -270,6 +1184,8 @@ def get_default_gatherers():
     Returns: dict[str: Gatherer]
 
     """
-    gatherers = [HttpGatherer, GrepGatherer, CommandGatherer]
+    gatherers = [HttpGatherer, TcpGatherer, DnsGatherer, GrepGatherer, CommandGatherer,
+                 DbGatherer, FileGatherer, CpuGatherer, MemoryGatherer, LoadGatherer,
+                 DiskGatherer]
 
     return {c.type(): c for c in gatherers}
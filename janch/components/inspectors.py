@@ -1,5 +1,6 @@
 """Inspectors are classes that compare and check the gathered data
 """
+import re
 from abc import ABC
 
 
@@ -39,17 +40,35 @@ class Inspector(ABC):
         """
         raise NotImplementedError("Use the parameters to assert that target matches expression")
 
-    async def inspect(self, target, expression):
+    def prepare(self, expression):
+        """Turns the expression from the config into the form match works with, such as a
+        compiled regular expression. It is called once when the config is loaded
+
+        Override it to check the expression up front. Raise ValueError when it is invalid
+
+        Args:
+            expression: The value that needs to be compared with. Specified in config
+
+        Returns: the expression passed to match
+
+        """
+        return expression
+
+    async def inspect(self, target, expression, prepared=None):
         """Creates parameters for the match method and creates return dic
 
         Args:
             target: str The value that needs to be inspected. Gathered by gatherer
             expression: str The value that needs to be compared with. Specified in config
+            prepared: The expression as returned by prepare. Prepared here when None
 
         Returns: dict with 'expected', 'actual' and 'match' as keys
 
         """
-        is_match = await self.match(target, expression)
+        if prepared is None:
+            prepared = self.prepare(expression)
+
+        is_match = await self.match(target, prepared)
 
         return {
             'expected': expression,
@@ -95,28 +114,128 @@ class RegexInspector(Inspector):
         """
         return 'regex'
 
+    def prepare(self, expression):
+        """Compiles the regular expression
+
+        Args:
+            expression: str specified in YML
+
+        Returns: re.Pattern
+
+        """
+        try:
+            return re.compile(expression)
+        except (re.error, TypeError) as e:
+            raise ValueError(f"Invalid regular expression {expression!r}: {e}")
+
     async def match(self, target, expression) -> bool:
         """Checks if the target matches a given regular expression
 
+        Targets that are not strings, such as numbers or headers, are matched in their
+        str form
+
         Args:
             target: Gathered data
-            expression: specified in YML
+            expression: re.Pattern or str specified in YML
 
         Returns: bool
 
         """
-        import re
-        pattern = re.compile(expression)
-        matches = pattern.match(target)
+        pattern = expression if isinstance(expression, re.Pattern) else re.compile(expression)
+        matches = pattern.match(target if isinstance(target, str) else str(target))
         return matches is not None
 
 
+class LessThanInspector(Inspector):
+    """Checks a<b for numbers such as timings"""
+
+    @staticmethod
+    def type() -> str:
+        """Return 'lt'
+
+        Returns: str
+
+        """
+        return 'lt'
+
+    def prepare(self, limit):
+        """Reads the limit as a number
+
+        Args:
+            limit: specified in YML
+
+        Returns: float
+
+        """
+        try:
+            return float(limit)
+        except (TypeError, ValueError):
+            raise ValueError(f"Expected a number but got {limit!r}")
+
+    async def match(self, target, limit) -> bool:
+        """Checks if the target is a number less than the limit
+
+        Args:
+            target: The gathered number
+            limit: specified in YML
+
+        Returns: bool
+
+        """
+        try:
+            return float(target) < float(limit)
+        except (TypeError, ValueError):
+            return False
+
+
+class GreaterThanInspector(Inspector):
+    """Checks a>b for numbers such as free space"""
+
+    @staticmethod
+    def type() -> str:
+        """Return 'gt'
+
+        Returns: str
+
+        """
+        return 'gt'
+
+    def prepare(self, limit):
+        """Reads the limit as a number
+
+        Args:
+            limit: specified in YML
+
+        Returns: float
+
+        """
+        try:
+            return float(limit)
+        except (TypeError, ValueError):
+            raise ValueError(f"Expected a number but got {limit!r}")
+
+    async def match(self, target, limit) -> bool:
+        """Checks if the target is a number greater than the limit
+
+        Args:
+            target: The gathered number
+            limit: specified in YML
+
+        Returns: bool
+
+        """
+        try:
+            return float(target) > float(limit)
+        except (TypeError, ValueError):
+            return False
+
+
 def get_default_inspectors():
     """Returns all inspectors with the inspector type/id as key
 
     Returns: dict[str: Inspector]
 
     """
-    inspectors = [EqualsInspector, RegexInspector]
+    inspectors = [EqualsInspector, RegexInspector, LessThanInspector, GreaterThanInspector]
 
     return {i.type(): i for i in inspectors}
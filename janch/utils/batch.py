@@ -0,0 +1,112 @@
+"""Contains the batcher that collects gathers requested together so they can run as one
+
+"""
+import asyncio
+
+from janch.utils import stats
+
+
+class Batcher():
+    """Collects requests for the same group made while the items of a run start, then runs
+    each group with a single call
+
+    """
+
+    def __init__(self, run):
+        """
+
+        Args:
+            run: async callable taking a group and a list of its requests and returning a
+                list with the result of each request
+        """
+        self.run = run
+        self._pending = {}
+        self._flusher = None
+        self._running = set()
+
+    def _size(self) -> int:
+        return sum(len(requests) for requests in self._pending.values())
+
+    async def submit(self, group, request):
+        """Await the result of a request, run together with the other requests of its group
+
+        Args:
+            group: hashable key of the group
+            request: anything understood by run
+
+        Returns: the result of the request
+
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._pending.setdefault(group, []).append((request, future))
+
+        if self._flusher is None:
+            self._flusher = asyncio.ensure_future(self._flush())
+
+        return await future
+
+    async def _flush(self):
+        # Items reach the batcher over a few loop iterations, so wait for one without arrivals
+        size = -1
+        while size != self._size():
+            size = self._size()
+            await asyncio.sleep(0)
+
+        batches = self._pending
+        self._pending = {}
+        self._flusher = None
+
+        # Running batches are kept so that closing the batcher can cancel them
+        for group, entries in batches.items():
+            task = asyncio.ensure_future(self._run_batch(group, entries))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run_batch(self, group, entries):
+        # Requests whose items were cancelled meanwhile are left out
+        entries = [(request, future) for request, future in entries if not future.done()]
+
+        if not entries:
+            return
+
+        stats.incr('batch.calls')
+        stats.incr('batch.requests', len(entries))
+
+        try:
+            results = await self.run(group, [request for request, future in entries])
+        except asyncio.CancelledError:
+            for request, future in entries:
+                future.cancel()
+            raise
+        except Exception as e:
+            for request, future in entries:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (request, future), result in zip(entries, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def close(self):
+        """Cancel batches that have not started yet along with the ones still running
+
+        Returns:
+
+        """
+        if self._flusher is not None:
+            self._flusher.cancel()
+            await asyncio.gather(self._flusher, return_exceptions=True)
+            self._flusher = None
+
+        running = list(self._running)
+        for task in running:
+            task.cancel()
+
+        await asyncio.gather(*running, return_exceptions=True)
+
+        for entries in self._pending.values():
+            for request, future in entries:
+                future.cancel()
+
+        self._pending = {}
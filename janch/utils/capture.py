@@ -0,0 +1,120 @@
+"""Contains the bounded capture of the output of commands
+
+A command may print far more than is worth inspecting. Only the first and last bytes of its
+output are kept so that the memory taken by a command does not depend on what it prints
+"""
+import re
+
+# Bytes read from a pipe at once
+CHUNK_SIZE = 64 * 1024
+
+# Bytes of the output before a chunk that are searched along with it, so that a match of
+# stop_on that spans two chunks is found
+_STOP_ON_OVERLAP = 4096
+
+
+class Capture():
+    """Keeps the first and the last half of max_bytes of a stream and counts the rest
+
+    With stop_on, the capture is stopped as soon as the stream contains a match of it
+    """
+
+    def __init__(self, max_bytes: int = None, stop_on: str = None):
+        """
+
+        Args:
+            max_bytes: int maximum number of bytes kept. Unbounded when None or 0
+            stop_on: str regular expression after a match of which the rest of the stream is
+                not needed
+        """
+        self.max_bytes = max_bytes
+        self.stop_on = re.compile(stop_on.encode()) if stop_on else None
+
+        self.size = 0
+        self.stopped = False
+
+        self._head = bytearray()
+        self._tail = bytearray()
+        self._recent = b''
+
+    @property
+    def truncated(self) -> bool:
+        """Whether bytes were dropped from the middle of the stream
+
+        Returns: bool
+
+        """
+        return len(self._head) + len(self._tail) < self.size
+
+    def feed(self, chunk: bytes) -> bool:
+        """Add the next bytes of the stream
+
+        Args:
+            chunk: bytes
+
+        Returns: bool whether the capture has stopped
+
+        """
+        if self.stopped or not chunk:
+            return self.stopped
+
+        self.size += len(chunk)
+
+        if not self.max_bytes:
+            self._head += chunk
+        else:
+            head_size = self.max_bytes - self.max_bytes // 2
+            taken = max(head_size - len(self._head), 0)
+            self._head += chunk[:taken]
+
+            tail_size = self.max_bytes // 2
+            if tail_size:
+                self._tail += chunk[taken:]
+                del self._tail[:-tail_size]
+
+        if self.stop_on:
+            window = self._recent + chunk
+            self.stopped = self.stop_on.search(window) is not None
+            self._recent = window[-_STOP_ON_OVERLAP:]
+
+        return self.stopped
+
+    def getvalue(self) -> bytes:
+        """The bytes kept, with a note of how many were dropped in between
+
+        Returns: bytes
+
+        """
+        if not self.truncated:
+            return bytes(self._head + self._tail)
+
+        dropped = self.size - len(self._head) - len(self._tail)
+
+        return bytes(self._head) + f"\n[{dropped} bytes truncated]\n".encode() + bytes(self._tail)
+
+    def decode(self) -> str:
+        """The bytes kept as stripped text
+
+        Returns: str
+
+        """
+        return self.getvalue().decode(errors='replace').strip()
+
+
+async def read(stream, capture: Capture):
+    """Feed a stream to a capture until it ends or the capture stops
+
+    Args:
+        stream: asyncio.StreamReader
+        capture: Capture
+
+    Returns: Capture
+
+    """
+    while not capture.stopped:
+        chunk = await stream.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        capture.feed(chunk)
+
+    return capture
@@ -0,0 +1,77 @@
+"""Contains the single flight logic that runs identical gathers only once
+
+"""
+import asyncio
+import json
+
+from janch.utils import stats
+
+
+def get_key(type: str, settings: dict, ignore: tuple = ()) -> str:
+    """Normalizes the gather section of an item so that identical gathers share a key
+
+    Args:
+        type: str gatherer type
+        settings: dict gather section of an item
+        ignore: tuple of setting names that do not change what is gathered
+
+    Returns: str
+
+    """
+    normalized = {k: v for k, v in settings.items() if k not in ignore}
+    normalized['type'] = type
+
+    return json.dumps(normalized, sort_keys=True, default=str)
+
+
+class Coalescer():
+    """Runs each unique gather once and shares the result with every item that asks for it
+
+    """
+
+    def __init__(self, keep: bool = True):
+        """
+
+        Args:
+            keep: bool whether finished gathers are shared for the rest of the run or only
+                while they are in flight
+        """
+        self.keep = keep
+        self._futures = {}
+
+    async def run(self, key: str, factory):
+        """Await the gather for the key, starting it only if it is not already known
+
+        Args:
+            key: str from get_key
+            factory: callable returning the coroutine that gathers
+
+        Returns: the result of the gather
+
+        """
+        if key in self._futures:
+            stats.incr('gathers.coalesced')
+        else:
+            stats.incr('gathers.run')
+            future = asyncio.ensure_future(factory())
+            self._futures[key] = future
+
+            if not self.keep:
+                future.add_done_callback(lambda f: self._futures.pop(key, None))
+
+        # Shielded so that one item being cancelled does not cancel the gather for the others
+        return await asyncio.shield(self._futures[key])
+
+    async def close(self):
+        """Cancel the gathers that are still in flight
+
+        Returns:
+
+        """
+        futures = list(self._futures.values())
+        self._futures.clear()
+
+        for future in futures:
+            future.cancel()
+
+        await asyncio.gather(*futures, return_exceptions=True)
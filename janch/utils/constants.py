@@ -1,6 +1,130 @@
 """Place all constants here
 
 """
+import os
 
 # Returned by Gatherer in its 'error' field when no error occurred
 NO_ERROR = 'NOERROR'
+
+# Returned by the engine in the 'error' field when a gather did not finish in time
+TIMED_OUT = 'TIMEOUT'
+
+# Returned by the engine in the 'error' field when the host of a gather is considered down
+CIRCUIT_OPEN = 'CIRCUIT_OPEN'
+
+# Returned in the 'error' field of items whose worker process died before reporting them
+WORKER_DIED = 'WORKER_DIED'
+
+# Top level key of the config yml that holds run settings instead of an item
+SETTINGS_KEY = 'janch'
+
+# Maximum number of gathers in flight at once across all gatherer types
+DEFAULT_CONCURRENCY_LIMIT = 256
+
+# Maximum number of gathers in flight at once for a specific gatherer type
+DEFAULT_TYPE_LIMITS = {
+    'command': os.cpu_count() or 1,
+    'http': 200,
+    'tcp': 200
+}
+
+# Maximum number of gathers in flight at once against the same host
+DEFAULT_HOST_LIMIT = 8
+
+# Maximum number of bytes of a http response body that are read
+DEFAULT_MAX_BODY_BYTES = 1024 * 1024
+
+# Bodies of http responses up to this many bytes are read even when they are not inspected, so
+# that their connection can be reused. Larger ones are not downloaded and close the connection
+DEFAULT_DRAIN_BYTES = 64 * 1024
+
+# Maximum number of bytes of the stdout and of the stderr of a command that are kept
+DEFAULT_MAX_OUTPUT_BYTES = 1024 * 1024
+
+# Seconds for which the ETag and Last-Modified of a revalidated url are remembered
+DEFAULT_VALIDATOR_TTL = 7 * 24 * 60 * 60
+
+# Seconds for which the position reached in a file by an incremental grep is remembered
+DEFAULT_GREP_POSITION_TTL = 30 * 24 * 60 * 60
+
+# Maximum number of open connections in the shared http pool
+DEFAULT_HTTP_POOL_SIZE = 200
+
+# Seconds for which resolved host names are cached by the shared http pool
+DEFAULT_DNS_TTL = 300
+
+# Seconds for which an idle connection is kept open for reuse. 0 disables keep-alive
+DEFAULT_KEEPALIVE = 15
+
+# Number of long lived shells that run commands when the run settings have a shells section
+DEFAULT_SHELL_POOL_SIZE = os.cpu_count() or 1
+
+# Maximum number of bytes of the banner of a tcp server that are read
+DEFAULT_BANNER_BYTES = 1024
+
+# Seconds a tcp gather waits for the server to send its banner
+DEFAULT_BANNER_SECONDS = 2
+
+# Seconds for which the hash of a file is remembered along with its size and modification time
+DEFAULT_HASH_INDEX_TTL = 30 * 24 * 60 * 60
+
+# Bytes of a file read at once while hashing it
+DEFAULT_HASH_CHUNK_SIZE = 1024 * 1024
+
+# Maximum number of connections to each database during a run
+DEFAULT_DB_POOL_SIZE = 4
+
+# Seconds after which a database query is interrupted
+DEFAULT_QUERY_TIMEOUT = 10
+
+# Seconds between the two readings of /proc/stat from which cpu usage is worked out
+DEFAULT_CPU_SAMPLE_SECONDS = 0.5
+
+# Seconds for which readings of /proc files are shared between items in watch mode. In other
+# runs they are shared for the whole run
+DEFAULT_PROC_SNAPSHOT_AGE = 1
+
+# Seconds a gather may take before it is cancelled, per gatherer type
+DEFAULT_TIMEOUTS = {
+    'http': 30,
+    'tcp': 10,
+    'command': 60,
+    'grep': 60
+}
+
+# Seconds a gather of a type without a default in DEFAULT_TIMEOUTS may take
+DEFAULT_TIMEOUT = 60
+
+# Seconds between runs of an item in watch mode when the item does not set an interval
+DEFAULT_INTERVAL = 60
+
+# Fraction of the interval by which each run in watch mode is randomly moved
+DEFAULT_JITTER = 0.1
+
+# Number of gather results kept by the in-memory cache
+DEFAULT_CACHE_SIZE = 1024
+
+# File used by the sqlite cache which is shared between runs
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'janch', 'cache.sqlite')
+
+# File keeping the state that gatherers carry between runs, whatever the type of the cache
+DEFAULT_STATE_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'janch', 'state.sqlite')
+
+# Seconds waited before the first retry of a failed gather. Doubled on every further retry
+DEFAULT_RETRY_BACKOFF = 0.5
+
+# Maximum seconds waited between retries
+DEFAULT_RETRY_MAX_BACKOFF = 30
+
+# Fraction of the backoff by which each wait is randomly moved
+DEFAULT_RETRY_JITTER = 0.1
+
+# Statuses gathered by http gatherers that are worth retrying
+DEFAULT_RETRY_STATUSES = [429, 502, 503, 504]
+
+# Consecutive failed gathers against a host after which the host is considered down. 0 turns
+# the circuit breaker off unless the run settings set a threshold
+DEFAULT_CIRCUIT_THRESHOLD = 0
+
+# Seconds after which a gather is let through to a host that is considered down
+DEFAULT_CIRCUIT_RESET = 30
@@ -4,8 +4,11 @@ The dictionaries are populated during initialization
 """
 
 config = {}
+settings = {}
 gatherers = {}
 inspectors = {}
 loggers = {}
 formatters = {}
 environment = {}
+caches = {}
+plan = {}
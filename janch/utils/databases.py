@@ -0,0 +1,182 @@
+"""Contains the database connections shared by the db gathers of a run
+
+The engine opens the pools at the start of a run and closes them at the end. Each database,
+identified by its dsn, gets a pool of its own so that many queries reuse a few connections
+"""
+import asyncio
+import sqlite3
+from urllib.parse import urlparse, quote
+
+from janch.utils import stats
+from janch.utils.constants import DEFAULT_DB_POOL_SIZE
+
+_state = {
+    'settings': None,
+    'pools': {}
+}
+
+
+def _connect_sqlite(dsn):
+    # sqlite:///relative/path, sqlite:////absolute/path or sqlite:///:memory:
+    path = dsn.split('://', 1)[1][1:]
+    if not path:
+        raise ValueError(f"No database file in {dsn}")
+
+    if path == ':memory:':
+        return sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+
+    # A missing database is an error rather than created empty
+    return sqlite3.connect(f"file:{quote(path)}?mode=rw", uri=True, check_same_thread=False,
+                           isolation_level=None)
+
+
+# Functions that open a connection for each dsn scheme
+DRIVERS = {
+    'sqlite': _connect_sqlite
+}
+
+
+def open_pools(settings: dict = None):
+    """Start handing out pools for the run
+
+    Args:
+        settings: dict db section of the run settings with an optional 'pool_size'
+
+    Returns:
+
+    """
+    _state['settings'] = dict(settings or {})
+    _state['pools'] = {}
+
+
+def get_pool(dsn: str):
+    """The pool of the run for a dsn, created on first use
+
+    Args:
+        dsn: str e.g. sqlite:///data/app.db
+
+    Returns: ConnectionPool or None when no run is in progress
+
+    """
+    if _state['settings'] is None:
+        return None
+
+    if dsn not in _state['pools']:
+        _state['pools'][dsn] = ConnectionPool(
+            dsn, _state['settings'].get('pool_size', DEFAULT_DB_POOL_SIZE))
+
+    return _state['pools'][dsn]
+
+
+async def close_pools():
+    """Close every pool of the run along with its connections
+
+    Returns:
+
+    """
+    pools = list(_state['pools'].values())
+    _state['settings'] = None
+    _state['pools'] = {}
+
+    for pool in pools:
+        await pool.close()
+
+
+class ConnectionPool():
+    """Hands out at most size connections to a database, opening them as they are needed
+
+    Connections are used by one query at a time in a thread of the default executor
+    """
+
+    def __init__(self, dsn: str, size: int):
+        """
+
+        Args:
+            dsn: str the scheme selects the driver in DRIVERS
+            size: int maximum number of connections
+        """
+        scheme = urlparse(dsn).scheme
+        if scheme not in DRIVERS:
+            raise ValueError(f"Unsupported database {scheme or dsn}. Supported: "
+                             f"{', '.join(DRIVERS)}")
+
+        self.dsn = dsn
+        self.size = size
+        self.closed = False
+
+        self._connect = DRIVERS[scheme]
+        self._slots = asyncio.Semaphore(size)
+        self._idle = []
+
+    async def query(self, sql: str, timeout: float = None) -> tuple:
+        """Run a query on an idle connection, waiting for one when all of them are busy
+
+        Args:
+            sql: str
+            timeout: float seconds after which the query is interrupted
+
+        Returns: tuple of list of column names, first row or None and int number of rows
+
+        """
+        loop = asyncio.get_running_loop()
+
+        async with self._slots:
+            if self._idle:
+                connection = self._idle.pop()
+            else:
+                connection = await loop.run_in_executor(None, self._connect, self.dsn)
+                stats.incr('db.connections')
+
+            running = loop.run_in_executor(None, ConnectionPool._execute, connection, sql)
+
+            try:
+                # The connection is not handed out again before its query has stopped
+                ret = await asyncio.wait_for(asyncio.shield(running), timeout)
+            except BaseException:
+                connection.interrupt()
+                await asyncio.gather(running, return_exceptions=True)
+                self._release(connection)
+                raise
+
+            stats.incr('db.queries')
+            self._release(connection)
+
+            return ret
+
+    @staticmethod
+    def _execute(connection, sql):
+        cursor = connection.execute(sql)
+
+        try:
+            columns = [column[0] for column in cursor.description or []]
+            first = cursor.fetchone()
+            count = 0 if first is None else 1
+
+            while True:
+                rows = cursor.fetchmany(1000)
+                if not rows:
+                    break
+                count += len(rows)
+        finally:
+            cursor.close()
+
+        return columns, first, count
+
+    def _release(self, connection):
+        if self.closed:
+            connection.close()
+        else:
+            self._idle.append(connection)
+
+    async def close(self):
+        """Close the idle connections. Connections still in use are closed when released
+
+        Returns:
+
+        """
+        self.closed = True
+
+        for connection in self._idle:
+            connection.close()
+
+        self._idle.clear()
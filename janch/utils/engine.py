@@ -2,14 +2,32 @@
 """
 
 import asyncio
+from contextlib import asynccontextmanager
 
-from janch.utils import context
-from janch.utils.constants import NO_ERROR
+from janch.utils import context, stats, sessions, store, shells, procfs, resolver, databases, \
+    plan
+from janch.utils.batch import Batcher
+from janch.utils.coalesce import Coalescer, get_key
+from janch.utils.constants import NO_ERROR, TIMED_OUT, CIRCUIT_OPEN, DEFAULT_TIMEOUTS, \
+    DEFAULT_TIMEOUT, DEFAULT_PROC_SNAPSHOT_AGE, DEFAULT_STATE_PATH
+from janch.utils.resilience import RetryPolicy, CircuitBreaker, is_error, get_circuit_key
+from janch.utils.scheduler import Scheduler, get_host
 
 _state = {
-    'is_header_logged': False
+    'is_header_logged': False,
+    'scheduler': None,
+    'coalescer': None,
+    'cache_type': None,
+    'cache': None,
+    'breaker': None,
+    'fields': {},
+    'inspections': {},
+    'batcher': None
 }
 
+# Gather settings that are read by the engine and do not change what is gathered
+ENGINE_SETTINGS = ('timeout', 'cache_ttl', 'retry')
+
 
 def debug(message):
     """Temporarily placed for enabling and disabling debugging
@@ -23,6 +41,8 @@ def debug(message):
 async def inspect(gathered, settings):
     """Runs inspection on gathered data. Loads the inspector based on the settings
 
+    Items of the initialized config are inspected with their compiled plan instead
+
     Args:
         gathered: dict
         settings: dict with settings from the inspect section of the config yml
@@ -30,42 +50,191 @@ async def inspect(gathered, settings):
     Returns: dict containing results of the inspection
 
     """
+    return await _inspect_planned(gathered, plan.compile_item(settings, context.inspectors))
+
+
+async def _inspect_planned(gathered, item_plan):
     debug("Inspecting")
 
     ret = {}
 
-    DEFAULT = 'regex'
+    for inspection in item_plan.inspections:
+        if inspection.field in gathered:
+            ret[inspection.field] = await inspection.inspector.inspect(
+                gathered[inspection.field], inspection.expression, inspection.prepared)
+        else:
+            ret[inspection.field] = None
 
-    for field_name, details in settings.items():
+    debug("Inspection Completed")
 
-        if field_name in gathered:
+    return ret
 
-            if isinstance(details, dict):
-                type = details.get('type') or DEFAULT
-                value = details.get('value')
-            elif not isinstance(details, str):
-                type = 'equals'
-                value = details
-            else:
-                type = DEFAULT
-                value = details
 
-            inspector = context.inspectors[type](None)
+def _get_plan(item, settings):
+    # The plan compiled at init is used unless the item was not in the initialized config
+    # or its inspect section was replaced since
+    item_plan = context.plan.get(item)
 
-            inspected = await inspector.inspect(gathered[field_name], value)
-            ret[field_name] = inspected
-        else:
-            ret[field_name] = None
+    if item_plan is None or item_plan.source is not settings['inspect']:
+        item_plan = plan.compile_item(settings['inspect'], context.inspectors)
 
-    debug("Inspection Completed")
+    return item_plan
+
+
+def get_timeout(type, settings):
+    """Seconds the gather may take. The item's own timeout wins over the run's default
+    for the type, which wins over the built in default
+
+    Args:
+        type: str gatherer type
+        settings: dict representing gather related settings from the config yml
+
+    Returns: float or None for no timeout
+
+    """
+    if 'timeout' in settings:
+        return settings['timeout']
+
+    timeouts = context.settings.get('timeouts') or {}
+
+    if type in timeouts:
+        return timeouts[type]
+
+    return DEFAULT_TIMEOUTS.get(type, DEFAULT_TIMEOUT)
+
+
+async def _gather_many(gatherer_class, settings_list):
+    return await gatherer_class.gather_many(settings_list)
+
+
+async def _gather_in_time(gatherer, timeout):
+    batcher = _state.get('batcher')
+
+    # Gatherers that can gather for several items at once are handed the items of their type
+    # that are waiting together
+    if batcher and gatherer.gathers_many():
+        gathering = batcher.submit(type(gatherer), gatherer.settings)
+    else:
+        gathering = gatherer.gather()
+
+    try:
+        return await asyncio.wait_for(gathering, timeout)
+    except asyncio.TimeoutError:
+        stats.incr('timeouts')
+        return {'error': TIMED_OUT}
+
+
+async def _gather_guarded(type, gatherer, settings):
+    breaker = _state.get('breaker')
+    host = get_circuit_key(settings)
+    timeout = get_timeout(type, settings)
+
+    if not breaker or not host:
+        return await _gather_in_time(gatherer, timeout)
+
+    if not breaker.allow(host):
+        stats.incr('circuit.short_circuited')
+        return {'error': CIRCUIT_OPEN}
+
+    try:
+        gathered = await _gather_in_time(gatherer, timeout)
+    except asyncio.CancelledError:
+        breaker.abandon(host)
+        raise
+
+    breaker.record(host, not is_error(gathered))
+
+    return gathered
 
-    return ret
+
+async def _gather_scheduled(type, gatherer, settings):
+    scheduler = _state.get('scheduler')
+
+    # The circuit breaker is consulted once a slot is free so that gathers queued behind
+    # the ones that tripped it are refused straight away
+    if scheduler:
+        async with scheduler.slot(type, get_host(settings)):
+            return await _gather_guarded(type, gatherer, settings)
+
+    return await _gather_guarded(type, gatherer, settings)
+
+
+async def _gather_resilient(type, gatherer, settings):
+    policy = RetryPolicy.from_settings(settings.get('retry', context.settings.get('retry')))
+    attempt = 0
+    failed = None
+
+    while True:
+        gathered = await _gather_scheduled(type, gatherer, settings)
+
+        # A retry refused by the circuit breaker reports the failure that was being retried
+        if gathered.get('error') == CIRCUIT_OPEN:
+            return failed or gathered
+
+        if attempt >= policy.count or not policy.is_retryable(gathered):
+            return gathered
+
+        failed = gathered
+
+        stats.incr('retries')
+        await asyncio.sleep(policy.get_delay(attempt))
+        attempt += 1
+
+
+def _get_cache():
+    # The cache is only created once an item asks for it so that runs without caching
+    # never touch the disk
+    if _state['cache'] is None and _state['cache_type']:
+        cache_settings = context.settings.get('cache') or {}
+        _state['cache'] = context.caches[_state['cache_type']](cache_settings)
+
+    return _state['cache']
+
+
+def _open_state():
+    # State kept by gatherers between runs must survive restarts and is never evicted, so it
+    # is kept in a sqlite file of its own whatever the type of the cache
+    state_settings = context.settings.get('state') or {}
+    return context.caches['sqlite']({'path': state_settings.get('path', DEFAULT_STATE_PATH)})
+
+
+async def _gather_cached(type, gatherer, settings):
+    ttl = settings.get('cache_ttl')
+    cache = _get_cache() if ttl else None
+
+    if not cache:
+        return await _gather_resilient(type, gatherer, settings)
+
+    key = get_key(type, settings, ENGINE_SETTINGS)
+    if gatherer.fields is not None:
+        key += '|' + ','.join(sorted(gatherer.fields))
+
+    cached = await cache.get(key)
+
+    if cached is not None:
+        stats.incr('cache.hits')
+        return cached
+
+    stats.incr('cache.misses')
+    gathered = await _gather_resilient(type, gatherer, settings)
+
+    # Failed gathers are not cached so that they are retried on the next run
+    if gathered.get('error') == NO_ERROR:
+        await cache.set(key, gathered, ttl)
+
+    return gathered
 
 
 async def gather(settings):
     """Use the settings to gather information. Use the settings type to use the
     right gatherer class
 
+    A gather that does not finish within its timeout is cancelled and reported with
+    TIMEOUT as its error. Items with identical gather sections share a single gather.
+    Items with a cache_ttl reuse a cached result until it is cache_ttl seconds old.
+    Failed gathers are retried according to the retry settings and gathers against a host
+    that keeps failing are refused with CIRCUIT_OPEN as their error
+
     Args:
         settings: dict representing gather related settings from the config yml
 
@@ -79,7 +248,18 @@ async def gather(settings):
     gathered = None
 
     if gatherer:
-        gathered = await gatherer(settings).gather()
+        coalescer = _state.get('coalescer')
+        key = get_key(type, settings)
+
+        instance = gatherer(settings)
+        instance.fields = _state['fields'].get(key)
+
+        if coalescer:
+            shared = await coalescer.run(key, lambda: _gather_cached(type, instance, settings))
+            # Each item gets its own copy as the result is shared
+            gathered = dict(shared)
+        else:
+            gathered = await _gather_cached(type, instance, settings)
 
     debug("Gathering Completed")
 
@@ -136,39 +316,234 @@ async def log(formatted):
     debug("Logging completed")
 
 
-def _set_up_default_item_settings(settings):
-    if not 'inspect' in settings:
-        settings.update({'inspect': {}})
 
-    if not 'error' in settings.get('inspect'):
-        settings['inspect'].update({'error': NO_ERROR})
+class Result():
+    """The outcome of running Janch on a single item
 
+    """
 
-async def start_item(item, settings):
-    """Runs Janch process on a specific item
+    def __init__(self, item, settings, gathered, inspected, header, body):
+        """
+
+        Args:
+            item: str name of the item
+            settings: dict configuration of the item
+            gathered: dict the gathered information
+            inspected: dict the inspected information
+            header: str formatted header or None
+            body: str formatted body
+        """
+        self.item = item
+        self.settings = settings
+        self.gathered = gathered
+        self.inspected = inspected
+        self.header = header
+        self.body = body
+
+    @property
+    def matched(self) -> bool:
+        """Whether every inspection of the item matched
+
+        Returns: bool
+
+        """
+        return all(v is not None and v['match'] for v in self.inspected.values())
+
+
+async def run_item(item, settings) -> Result:
+    """Gathers, inspects and formats a specific item without logging it
 
     Args:
         item: str name of the item
         settings: dict configuration of the item
 
-    Returns:
+    Returns: Result
 
     """
     debug(f"Starting {item}")
 
-    _set_up_default_item_settings(settings)
+    plan.set_up_defaults(settings)
 
     gathered = await gather(settings['gather'])
-    inspected = await inspect(gathered, settings.get('inspect', {}))
+
+    return await _complete_item(item, settings, gathered)
+
+
+async def _complete_item(item, settings, gathered) -> Result:
+    # Data that was revalidated as not modified is the data of the last successful gather,
+    # so it is inspected the same way as last time
+    if gathered.get('not_modified') and item in _state['inspections']:
+        inspected = _state['inspections'][item]
+    else:
+        inspected = await _inspect_planned(gathered, _get_plan(item, settings))
+
+        if gathered.get('error') == NO_ERROR:
+            _state['inspections'][item] = inspected
+
     header, body = await furnish(item, settings, gathered, inspected)
 
+    debug("Complete")
+
+    return Result(item, settings, gathered, inspected, header, body)
+
+
+async def fail_item(item, settings, error) -> Result:
+    """Inspects and formats an item that could not be gathered, with the error as gathered
+
+    Args:
+        item: str name of the item
+        settings: dict configuration of the item
+        error: str
+
+    Returns: Result
+
+    """
+    plan.set_up_defaults(settings)
+
+    return await _complete_item(item, settings, {'error': error})
+
+
+async def _run_item_before(item, settings, deadline) -> Result:
+    try:
+        return await asyncio.wait_for(run_item(item, settings), deadline)
+    except asyncio.TimeoutError:
+        stats.incr('deadline.cancelled')
+        return await fail_item(item, settings, TIMED_OUT)
+
+
+async def emit(result: Result):
+    """Logs a result. The header is logged only before the first result
+
+    Args:
+        result: Result
+
+    Returns:
+
+    """
     if not _state.get('is_header_logged'):
-        header_logged = await log(header)
+        header_logged = await log(result.header)
         _state.update({'is_header_logged': True})
 
-    logged = await log(body)
+    logged = await log(result.body)
 
-    debug("Complete")
+
+async def start_item(item, settings):
+    """Runs Janch process on a specific item
+
+    Args:
+        item: str name of the item
+        settings: dict configuration of the item
+
+    Returns: Result
+
+    """
+    result = await run_item(item, settings)
+    await emit(result)
+
+    return result
+
+
+def _register_fields(config: dict):
+    # Gatherers are told which fields are inspected so that they can skip expensive ones.
+    # Items sharing a gather need the union of their fields
+    fields = {}
+
+    for item, settings in config.items():
+        plan.set_up_defaults(settings)
+        gather_settings = settings['gather']
+        key = get_key(gather_settings.get('type') or 'http', gather_settings)
+        fields.setdefault(key, set()).update(settings['inspect'])
+
+    _state['fields'] = fields
+
+
+@asynccontextmanager
+async def resources(repeating: bool = False, config: dict = None):
+    """Opens everything that is shared between the items of a run and closes it at the end
+
+    Args:
+        repeating: bool whether items will be run repeatedly, as in watch mode. Identical
+            gathers are then only shared while they are in flight and the cache defaults to
+            memory instead of sqlite
+        config: dict of the items that will be run. Gatherers of items outside of it gather
+            every field
+
+    Returns:
+
+    """
+    stats.reset()
+    _register_fields(config or {})
+    _state['scheduler'] = Scheduler.from_settings(context.settings.get('concurrency'))
+    _state['coalescer'] = Coalescer(keep=not repeating)
+    _state['batcher'] = Batcher(_gather_many)
+    _state['breaker'] = CircuitBreaker.from_settings(context.settings.get('circuit'))
+    _state['cache_type'] = (context.settings.get('cache') or {}).get(
+        'type', 'memory' if repeating else 'sqlite')
+    store.set_opener(_get_cache)
+    store.open_state(_open_state)
+    resolver.open_resolver((context.settings.get('dns') or {}).get(
+        'ttl', (context.settings.get('http') or {}).get('dns_ttl')))
+    await sessions.open_session(context.settings.get('http'))
+    await shells.open_pool(context.settings.get('shells'))
+    databases.open_pools(context.settings.get('db'))
+    procfs.open_snapshot(DEFAULT_PROC_SNAPSHOT_AGE if repeating else None)
+
+    try:
+        yield
+    finally:
+        await _state['coalescer'].close()
+        await _state['batcher'].close()
+        await sessions.close_session()
+        resolver.close_resolver()
+        await shells.close_pool()
+        procfs.close_snapshot()
+        await databases.close_pools()
+        store.set_opener(None)
+        await store.close_state()
+
+        if _state['cache']:
+            await _state['cache'].close()
+
+        _state['cache'] = None
+        _state['cache_type'] = None
+        _state['coalescer'] = None
+        _state['batcher'] = None
+        _state['breaker'] = None
+        _state['scheduler'] = None
+        _state['fields'] = {}
+        _state['inspections'] = {}
+
+
+async def iter_results(config: dict = None):
+    """Runs every item and yields each result as soon as the item completes
+
+    When the run settings have a deadline in seconds, items still outstanding at the
+    deadline are cancelled and reported with TIMEOUT as their error
+
+    Args:
+        config: dict of items to run. Defaults to the initialized config
+
+    Returns: async generator of Result in completion order
+
+    """
+    config = context.config if config is None else config
+    deadline = context.settings.get('deadline')
+
+    async with resources(config=config):
+        if deadline:
+            tasks = [asyncio.ensure_future(_run_item_before(item, settings, deadline))
+                     for item, settings in config.items()]
+        else:
+            tasks = [asyncio.ensure_future(run_item(item, settings))
+                     for item, settings in config.items()]
+
+        try:
+            for next_completed in asyncio.as_completed(tasks):
+                yield await next_completed
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
 
 
 async def start():
@@ -177,5 +552,19 @@ async def start():
     Returns:
 
     """
-    config = context.config
-    await asyncio.gather(*(start_item(item, settings) for item, settings in config.items()))
+    async for result in iter_results():
+        await emit(result)
+
+    await report()
+
+
+async def report():
+    """Logs the statistics of the run when they were asked for in the run settings
+
+    Returns:
+
+    """
+    if context.settings.get('stats'):
+        header, body = stats.summary()
+        await log(header)
+        await log(body)
@@ -0,0 +1,266 @@
+"""Contains an in-process replacement for grep that scans memory mapped files
+
+Files that cannot be mapped, such as those of /proc and /sys which report a size of 0, and
+pipes, are read in chunks instead
+"""
+import mmap
+import os
+import re
+from stat import S_ISREG
+
+# Bytes read at a time from files that are read rather than memory mapped
+CHUNK_SIZE = 1024 * 1024
+
+
+def compile(search: str):
+    """Compile a search string so that ^ and $ match at the start and end of each line
+
+    Args:
+        search: str regular expression
+
+    Returns: compiled bytes pattern
+
+    """
+    return re.compile(search.encode(), re.MULTILINE)
+
+
+def search_buffer(buffer, pattern, start: int, end: int, max_lines: int = None):
+    """Find the lines of buffer[start:end] that match the pattern, like grep does
+
+    Args:
+        buffer: bytes-like object such as an mmap
+        pattern: compiled bytes pattern
+        start: int offset of the start of a line to scan from
+        end: int offset to scan to
+        max_lines: int maximum number of matching lines to return. All are counted
+
+    Returns: list of str, int the matching lines and the number of matching lines
+
+    """
+    lines = []
+    count = 0
+    position = start
+
+    while position < end:
+        found = pattern.search(buffer, position, end)
+
+        if not found:
+            break
+
+        line_start = buffer.rfind(b'\n', start, found.start()) + 1 or start
+        line_end = buffer.find(b'\n', found.start(), end)
+        line_end = end if line_end == -1 else line_end
+
+        # A match that runs over the end of its line does not count. Check the line alone
+        if found.end() > line_end and not pattern.search(buffer, line_start, line_end):
+            position = found.start() + 1
+            continue
+
+        count += 1
+        if max_lines is None or len(lines) < max_lines:
+            lines.append(bytes(buffer[line_start:line_end]).decode(errors='replace'))
+
+        position = line_end + 1
+
+    return lines, count
+
+
+def _combine(patterns: list):
+    # Patterns that cannot be combined, such as ones with inline flags, are searched one by one.
+    # Combining renumbers groups, which would send backreferences to the wrong group
+    if any(p.groups for p in patterns):
+        return None
+
+    try:
+        return re.compile(b'|'.join(b'(?:' + p.pattern + b')' for p in patterns), re.MULTILINE)
+    except re.error:
+        return None
+
+
+def search_buffer_many(buffer, patterns: list, start: int, end: int, max_lines: list = None):
+    """Find the lines of buffer[start:end] that match each of the patterns in a single pass
+
+    The patterns are combined into one alternation which finds candidate lines. Each candidate
+    line is then checked against every pattern so that each pattern gets the same lines it
+    would get searched on its own.
+
+    Args:
+        buffer: bytes-like object such as an mmap
+        patterns: list of compiled bytes patterns
+        start: int offset of the start of a line to scan from
+        end: int offset to scan to
+        max_lines: list with the maximum number of lines to return for each pattern, or None
+
+    Returns: list of (list of str, int) the matching lines and their number for each pattern
+
+    """
+    max_lines = max_lines or [None] * len(patterns)
+    combined = _combine(patterns)
+
+    if combined is None:
+        return [search_buffer(buffer, p, start, end, m) for p, m in zip(patterns, max_lines)]
+
+    results = [([], 0) for _ in patterns]
+    position = start
+
+    while position < end:
+        found = combined.search(buffer, position, end)
+
+        if not found:
+            break
+
+        line_start = buffer.rfind(b'\n', start, found.start()) + 1 or start
+        line_end = buffer.find(b'\n', found.start(), end)
+        line_end = end if line_end == -1 else line_end
+        line = None
+        matched = False
+
+        for i, pattern in enumerate(patterns):
+            if not pattern.search(buffer, line_start, line_end):
+                continue
+
+            matched = True
+            lines, count = results[i]
+
+            if max_lines[i] is None or len(lines) < max_lines[i]:
+                if line is None:
+                    line = bytes(buffer[line_start:line_end]).decode(errors='replace')
+                lines.append(line)
+
+            results[i] = (lines, count + 1)
+
+        # A candidate that ran over the end of its line matched none of the patterns on it
+        position = line_end + 1 if matched else found.start() + 1
+
+    return results
+
+
+def _search_range(f, pattern, start: int, end: int, max_lines: int = None):
+    if start >= end:
+        return [], 0
+
+    # Maps have to start at a multiple of the allocation granularity
+    aligned = start - start % mmap.ALLOCATIONGRANULARITY
+
+    with mmap.mmap(f.fileno(), end - aligned, access=mmap.ACCESS_READ, offset=aligned) as buffer:
+        return search_buffer(buffer, pattern, start - aligned, end - aligned, max_lines)
+
+
+def _read_lines(f, complete_only: bool = False):
+    # Yields what is left of the file in blocks of whole lines. A last line without a newline
+    # is yielded too unless complete_only
+    pending = b''
+
+    for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+        pending += chunk
+        cut = pending.rfind(b'\n') + 1
+
+        if cut:
+            yield pending[:cut]
+            pending = pending[cut:]
+
+    if pending and not complete_only:
+        yield pending
+
+
+def _search_stream(f, pattern, max_lines: int = None, complete_only: bool = False):
+    lines = []
+    count = 0
+    read = 0
+
+    for block in _read_lines(f, complete_only):
+        found, found_count = search_buffer(
+            block, pattern, 0, len(block), None if max_lines is None else max_lines - len(lines))
+        lines += found
+        count += found_count
+        read += len(block)
+
+    return lines, count, read
+
+
+def _search_stream_many(f, patterns: list, max_lines: list = None):
+    max_lines = max_lines or [None] * len(patterns)
+    results = [([], 0) for _ in patterns]
+
+    for block in _read_lines(f):
+        left = [None if m is None else m - len(lines) for m, (lines, _) in zip(max_lines, results)]
+        found = search_buffer_many(block, patterns, 0, len(block), left)
+        results = [(lines + more, count + more_count)
+                   for (lines, count), (more, more_count) in zip(results, found)]
+
+    return results
+
+
+def _is_mappable(f) -> bool:
+    # Files of /proc and /sys report a size of 0 although they have content
+    status = os.fstat(f.fileno())
+    return S_ISREG(status.st_mode) and status.st_size > 0
+
+
+def search_file(filepath: str, pattern, max_lines: int = None):
+    """Find the lines of a file that match the pattern. Regular files are memory mapped
+    rather than read
+
+    Args:
+        filepath: str
+        pattern: compiled bytes pattern
+        max_lines: int maximum number of matching lines to return. All are counted
+
+    Returns: list of str, int the matching lines and the number of matching lines
+
+    """
+    with open(filepath, 'rb') as f:
+        if not _is_mappable(f):
+            return _search_stream(f, pattern, max_lines)[:2]
+
+        return _search_range(f, pattern, 0, os.fstat(f.fileno()).st_size, max_lines)
+
+
+def search_file_many(filepath: str, patterns: list, max_lines: list = None):
+    """Find the lines of a file that match each of the patterns, reading the file only once
+
+    Args:
+        filepath: str
+        patterns: list of compiled bytes patterns
+        max_lines: list with the maximum number of lines to return for each pattern, or None
+
+    Returns: list of (list of str, int) the matching lines and their number for each pattern
+
+    """
+    with open(filepath, 'rb') as f:
+        if not _is_mappable(f):
+            return _search_stream_many(f, patterns, max_lines)
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            return search_buffer_many(buffer, patterns, 0, len(buffer), max_lines)
+
+
+def search_appended(filepath: str, pattern, position: dict = None, max_lines: int = None):
+    """Find the matching lines that were appended to a file since a previous search
+
+    Only complete lines are searched; a line still being written is searched once it ends.
+    The whole file is searched when it has been rotated, which is noticed by a change of
+    device or inode, or truncated below the previous position. The appended lines are read
+    rather than memory mapped, so a file truncated during the search only ends it early.
+
+    Args:
+        filepath: str
+        pattern: compiled bytes pattern
+        position: dict with 'device', 'inode' and 'offset' returned by the previous search
+        max_lines: int maximum number of matching lines to return. All are counted
+
+    Returns: list of str, int, dict the matching lines, their number and the new position
+
+    """
+    with open(filepath, 'rb') as f:
+        stat = os.fstat(f.fileno())
+        start = 0
+
+        if position and position['device'] == stat.st_dev and position['inode'] == stat.st_ino \
+                and position['offset'] <= stat.st_size:
+            start = position['offset']
+
+        f.seek(start)
+        lines, count, read = _search_stream(f, pattern, max_lines, complete_only=True)
+
+    return lines, count, {'device': stat.st_dev, 'inode': stat.st_ino, 'offset': start + read}
@@ -0,0 +1,119 @@
+"""Contains the inspection plan compiled from the config when Janch is initialized
+
+Each inspect entry is resolved to an inspector instance and a prepared expression once, so
+that mistakes such as an unknown inspector or a bad regular expression are reported before
+anything runs, and repeated runs do not parse the config again
+"""
+from typing import NamedTuple
+
+from janch.utils.constants import NO_ERROR
+
+# Inspector used when an inspect entry does not name one and its value is a string
+DEFAULT_INSPECTOR = 'regex'
+
+
+class Inspection(NamedTuple):
+    """How one field of an item is inspected"""
+    field: str
+    inspector: object
+    expression: object
+    prepared: object
+
+
+class ItemPlan(NamedTuple):
+    """The inspections of an item along with the inspect section they were compiled from"""
+    source: dict
+    inspections: tuple
+
+
+def set_up_defaults(settings: dict):
+    """Adds the inspect section, and the inspection of the error field, that every item has
+
+    Args:
+        settings: dict configuration of an item. Changed in place
+
+    Returns:
+
+    """
+    if 'inspect' not in settings:
+        settings.update({'inspect': {}})
+
+    if 'error' not in settings.get('inspect'):
+        settings['inspect'].update({'error': NO_ERROR})
+
+
+def compile_item(inspect_settings: dict, inspectors: dict) -> ItemPlan:
+    """Compile the inspect section of an item
+
+    Args:
+        inspect_settings: dict inspect section of an item
+        inspectors: dict of inspector classes by type
+
+    Returns: ItemPlan
+
+    Raises:
+        ValueError: naming each field whose inspection is invalid
+
+    """
+    inspections = []
+    problems = []
+
+    for field, details in inspect_settings.items():
+        if isinstance(details, dict):
+            type = details.get('type') or DEFAULT_INSPECTOR
+            expression = details.get('value')
+        elif not isinstance(details, str):
+            type = 'equals'
+            expression = details
+        else:
+            type = DEFAULT_INSPECTOR
+            expression = details
+
+        if type not in inspectors:
+            problems.append(f"{field}: unknown inspector {type}")
+            continue
+
+        inspector = inspectors[type](None)
+
+        try:
+            prepared = inspector.prepare(expression)
+        except ValueError as e:
+            problems.append(f"{field}: {e}")
+            continue
+
+        inspections.append(Inspection(field, inspector, expression, prepared))
+
+    if problems:
+        raise ValueError('; '.join(problems))
+
+    return ItemPlan(inspect_settings, tuple(inspections))
+
+
+def compile(config: dict, inspectors: dict) -> dict:
+    """Compile the inspect sections of all the items of a config
+
+    Args:
+        config: dict of items. Their default inspections are added in place
+        inspectors: dict of inspector classes by type
+
+    Returns: dict of ItemPlan by item name
+
+    Raises:
+        ValueError: listing every invalid inspection of every item
+
+    """
+    ret = {}
+    problems = []
+
+    for item, settings in config.items():
+        set_up_defaults(settings)
+
+        try:
+            ret[item] = compile_item(settings['inspect'], inspectors)
+        except ValueError as e:
+            problems.append(f"{item}: {e}")
+
+    if problems:
+        raise ValueError("Invalid inspections. " + '. '.join(problems))
+
+    return ret
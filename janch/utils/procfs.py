@@ -0,0 +1,215 @@
+"""Contains the reading of system metrics from /proc and statvfs
+
+The engine opens a snapshot at the start of a run so that every item reading the same proc
+file, or the same file system, shares a single read of it
+"""
+import asyncio
+import os
+
+from janch.utils import stats
+
+_state = {
+    'snapshot': None
+}
+
+
+class Snapshot():
+    """Remembers what was read during a run so that it is read only once
+
+    Readings older than max_age seconds are read again, which keeps long running watches
+    current. A max_age of None keeps every reading until the snapshot is closed
+    """
+
+    def __init__(self, max_age: float = None):
+        self.max_age = max_age
+        self._readings = {}
+
+    async def get(self, key, read):
+        """The reading under the key, taking it with read when there is none yet
+
+        Args:
+            key: hashable
+            read: async callable taking no arguments
+
+        Returns: the value returned by read
+
+        """
+        now = asyncio.get_running_loop().time()
+        reading = self._readings.get(key)
+
+        if reading and (self.max_age is None or now - reading[0] <= self.max_age):
+            stats.incr('procfs.shared')
+            return await asyncio.shield(reading[1])
+
+        future = asyncio.ensure_future(read())
+        self._readings[key] = (now, future)
+        stats.incr('procfs.reads')
+
+        try:
+            return await asyncio.shield(future)
+        except Exception:
+            # A failed reading is not kept so that the next item tries again
+            if self._readings.get(key, (None, None))[1] is future:
+                del self._readings[key]
+            raise
+
+    def close(self):
+        """Forget every reading
+
+        Returns:
+
+        """
+        for taken, future in self._readings.values():
+            future.cancel()
+
+        self._readings.clear()
+
+
+def open_snapshot(max_age: float = None):
+    """Open the snapshot shared by the items of a run
+
+    Args:
+        max_age: float seconds for which a reading is shared. None shares it for the whole run
+
+    Returns: Snapshot
+
+    """
+    close_snapshot()
+    _state['snapshot'] = Snapshot(max_age)
+
+    return _state['snapshot']
+
+
+def close_snapshot():
+    """Close the snapshot of the run
+
+    Returns:
+
+    """
+    if _state['snapshot']:
+        _state['snapshot'].close()
+
+    _state['snapshot'] = None
+
+
+async def _shared(key, read):
+    snapshot = _state['snapshot']
+
+    if snapshot is None:
+        return await read()
+
+    return await snapshot.get(key, read)
+
+
+def _read_text(path: str) -> str:
+    with open(path) as f:
+        return f.read()
+
+
+async def read_file(path: str) -> str:
+    """The content of a proc file, shared with the rest of the run
+
+    Args:
+        path: str e.g. /proc/meminfo
+
+    Returns: str
+
+    """
+
+    async def read():
+        return _read_text(path)
+
+    return await _shared(('file', path), read)
+
+
+async def statvfs(path: str):
+    """The statistics of the file system holding the path, shared with the rest of the run
+
+    Args:
+        path: str
+
+    Returns: os.statvfs_result
+
+    """
+
+    async def read():
+        return os.statvfs(path)
+
+    return await _shared(('statvfs', path), read)
+
+
+def parse_cpu_times(text: str) -> tuple:
+    """The busy and total time of all cpus from the content of /proc/stat
+
+    Guest time is left out as it is already counted as user time
+
+    Args:
+        text: str
+
+    Returns: tuple of int busy, int iowait and int total jiffies and int number of cpus
+
+    """
+    busy = iowait = total = count = 0
+
+    for line in text.splitlines():
+        if line.startswith('cpu '):
+            times = [int(v) for v in line.split()[1:9]]
+            times += [0] * (8 - len(times))
+            user, nice, system, idle, iowait, irq, softirq, steal = times
+            total = sum(times)
+            busy = total - idle - iowait
+        elif line.startswith('cpu'):
+            count += 1
+
+    return busy, iowait, total, count
+
+
+async def cpu_usage(seconds: float) -> dict:
+    """The share of cpu time spent busy and waiting on io over the next seconds, shared with the
+    rest of the run
+
+    Args:
+        seconds: float length of the sample
+
+    Returns: dict with 'usage_percent', 'iowait_percent' and 'cpu_count' keys
+
+    """
+
+    async def read():
+        before = parse_cpu_times(await read_file('/proc/stat'))
+        await asyncio.sleep(seconds)
+        after = parse_cpu_times(_read_text('/proc/stat'))
+
+        elapsed = after[2] - before[2]
+
+        def percent(index):
+            return round((after[index] - before[index]) * 100 / elapsed, 2) if elapsed else 0.0
+
+        return {
+            'usage_percent': percent(0),
+            'iowait_percent': percent(1),
+            'cpu_count': after[3]
+        }
+
+    return await _shared(('cpu', seconds), read)
+
+
+def parse_meminfo(text: str) -> dict:
+    """The values of /proc/meminfo in bytes
+
+    Args:
+        text: str content of /proc/meminfo
+
+    Returns: dict with the names of /proc/meminfo as keys and int bytes as values
+
+    """
+    ret = {}
+
+    for line in text.splitlines():
+        name, _, value = line.partition(':')
+        parts = value.split()
+
+        if parts and parts[0].isdigit():
+            ret[name] = int(parts[0]) * (1024 if parts[1:] == ['kB'] else 1)
+
+    return ret
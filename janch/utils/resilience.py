@@ -0,0 +1,223 @@
+"""Contains retrying of failed gathers and the circuit breaker that stops gathering from hosts
+that are down
+
+"""
+import random
+import time
+
+from janch.utils.constants import NO_ERROR, DEFAULT_RETRY_BACKOFF, DEFAULT_RETRY_MAX_BACKOFF, \
+    DEFAULT_RETRY_JITTER, DEFAULT_RETRY_STATUSES, DEFAULT_CIRCUIT_THRESHOLD, DEFAULT_CIRCUIT_RESET
+from janch.utils.scheduler import get_host
+
+
+def is_error(gathered: dict) -> bool:
+    """Whether the gather failed with an error
+
+    Args:
+        gathered: dict
+
+    Returns: bool
+
+    """
+    return gathered.get('error') not in (None, NO_ERROR)
+
+
+def get_circuit_key(settings: dict):
+    """Finds what the circuit breaker tracks for a gather
+
+    Gathers that name a port, such as tcp ones, are tracked per host and port, since a closed
+    port says nothing about the other ports of the host
+
+    Args:
+        settings: dict gather section of an item
+
+    Returns: str or None
+
+    """
+    host = get_host(settings)
+
+    if host and settings.get('port') is not None:
+        return f"{host}:{settings['port']}"
+
+    return host
+
+
+class RetryPolicy():
+    """Decides whether and when a failed gather is tried again
+
+    """
+
+    def __init__(self, count: int = 0, backoff: float = DEFAULT_RETRY_BACKOFF,
+                 max_backoff: float = DEFAULT_RETRY_MAX_BACKOFF, jitter: float = DEFAULT_RETRY_JITTER,
+                 statuses: list = None, errors: list = None):
+        """
+
+        Args:
+            count: int number of retries after the first attempt
+            backoff: float seconds before the first retry, doubled on every further retry
+            max_backoff: float maximum seconds between retries
+            jitter: float fraction of the backoff by which each wait is randomly moved
+            statuses: list of gathered statuses that are retried
+            errors: list of error class names or message parts that are retried. None retries
+                any error
+        """
+        self.count = count
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.statuses = DEFAULT_RETRY_STATUSES if statuses is None else statuses
+        self.errors = errors
+
+    @staticmethod
+    def from_settings(settings: dict = None):
+        """Create a policy from a retry section of the config
+
+        Args:
+            settings: dict with optional 'count', 'backoff', 'max_backoff', 'jitter', 'statuses'
+                and 'errors' keys
+
+        Returns: RetryPolicy
+
+        """
+        settings = settings or {}
+
+        return RetryPolicy(settings.get('count', 0),
+                           settings.get('backoff', DEFAULT_RETRY_BACKOFF),
+                           settings.get('max_backoff', DEFAULT_RETRY_MAX_BACKOFF),
+                           settings.get('jitter', DEFAULT_RETRY_JITTER),
+                           settings.get('statuses'),
+                           settings.get('errors'))
+
+    def is_retryable(self, gathered: dict) -> bool:
+        """Whether the outcome of a gather is worth retrying
+
+        Args:
+            gathered: dict
+
+        Returns: bool
+
+        """
+        if is_error(gathered):
+            if self.errors is None:
+                return True
+
+            error = gathered['error']
+            return any(e == type(error).__name__ or e in str(error) for e in self.errors)
+
+        return gathered.get('status') in self.statuses
+
+    def get_delay(self, attempt: int) -> float:
+        """Seconds to wait before the retry that follows the attempt
+
+        Args:
+            attempt: int starting at 0 for the first attempt
+
+        Returns: float
+
+        """
+        delay = min(self.backoff * 2 ** attempt, self.max_backoff)
+
+        return max(delay + random.uniform(-self.jitter, self.jitter) * delay, 0)
+
+
+class CircuitBreaker():
+    """Tracks consecutive failures per host and stops gathers against hosts that keep failing
+
+    After the threshold is reached the host is open and gathers against it are refused. Once
+    the reset time has passed a single gather is let through; if it succeeds the host is
+    closed again, otherwise it stays open for another reset period.
+    """
+
+    def __init__(self, threshold: int, reset: float = DEFAULT_CIRCUIT_RESET):
+        """
+
+        Args:
+            threshold: int consecutive failures after which a host is open
+            reset: float seconds after which a gather is let through to an open host
+        """
+        self.threshold = threshold
+        self.reset = reset
+        self._failures = {}
+        self._opened = {}
+        self._trials = set()
+
+    @staticmethod
+    def from_settings(settings: dict = None):
+        """Create a circuit breaker from the circuit section of the run settings
+
+        Args:
+            settings: dict with optional 'threshold' and 'reset' keys
+
+        Returns: CircuitBreaker or None when the threshold is 0
+
+        """
+        settings = settings or {}
+        threshold = settings.get('threshold', DEFAULT_CIRCUIT_THRESHOLD)
+
+        if not threshold:
+            return None
+
+        return CircuitBreaker(threshold, settings.get('reset', DEFAULT_CIRCUIT_RESET))
+
+    def is_open(self, host: str) -> bool:
+        """Whether the host is considered down
+
+        Args:
+            host: str
+
+        Returns: bool
+
+        """
+        return host in self._opened
+
+    def allow(self, host: str) -> bool:
+        """Whether a gather against the host may go ahead
+
+        Args:
+            host: str
+
+        Returns: bool
+
+        """
+        if host not in self._opened:
+            return True
+
+        if host in self._trials or time.monotonic() - self._opened[host] < self.reset:
+            return False
+
+        self._trials.add(host)
+
+        return True
+
+    def abandon(self, host: str):
+        """Forget a gather that was let through but never finished, such as a cancelled one
+
+        Args:
+            host: str
+
+        Returns:
+
+        """
+        self._trials.discard(host)
+
+    def record(self, host: str, succeeded: bool):
+        """Record the outcome of a gather against the host
+
+        Args:
+            host: str
+            succeeded: bool
+
+        Returns:
+
+        """
+        self._trials.discard(host)
+
+        if succeeded:
+            self._failures.pop(host, None)
+            self._opened.pop(host, None)
+            return
+
+        self._failures[host] = self._failures.get(host, 0) + 1
+
+        if self._failures[host] >= self.threshold or host in self._opened:
+            self._opened[host] = time.monotonic()
@@ -0,0 +1,158 @@
+"""Contains the resolver of host names shared by the gathers of a run
+
+The engine opens the resolver at the start of a run and closes it at the end. dns items use it
+directly and the shared http session through an aiohttp resolver, so a host name checked by
+many items is looked up once per run
+"""
+import asyncio
+import socket
+
+from aiohttp.abc import AbstractResolver
+
+from janch.utils import stats
+from janch.utils.constants import DEFAULT_DNS_TTL
+
+_state = {
+    'resolver': None
+}
+
+
+def get_resolver():
+    """Returns the shared resolver or None when no run is in progress
+
+    Returns: Resolver
+
+    """
+    return _state['resolver']
+
+
+def open_resolver(ttl: float = None):
+    """Create the shared resolver
+
+    Args:
+        ttl: float seconds for which an answer is remembered
+
+    Returns: Resolver
+
+    """
+    close_resolver()
+    _state['resolver'] = Resolver(DEFAULT_DNS_TTL if ttl is None else ttl)
+
+    return _state['resolver']
+
+
+def close_resolver():
+    """Forget the shared resolver and its answers
+
+    Returns:
+
+    """
+    if _state['resolver']:
+        _state['resolver'].close()
+
+    _state['resolver'] = None
+
+
+class Resolver():
+    """Looks up host names with the system resolver and remembers each answer for ttl seconds
+
+    The system resolver does not tell how long a record may be cached, so one ttl is used for
+    every answer. Concurrent lookups of the same name share a single query and failed lookups
+    are not remembered
+    """
+
+    def __init__(self, ttl: float):
+        """
+
+        Args:
+            ttl: float seconds for which an answer is remembered. 0 disables remembering
+        """
+        self.ttl = ttl
+        self._answers = {}
+
+    async def lookup(self, host: str, family: int = socket.AF_UNSPEC) -> tuple:
+        """The addresses of a host name
+
+        Args:
+            host: str host name
+            family: int socket.AF_INET, socket.AF_INET6 or socket.AF_UNSPEC for both
+
+        Returns: tuple of list of (family, proto, address) tuples and bool whether the answer
+            was remembered from an earlier lookup
+
+        """
+        loop = asyncio.get_running_loop()
+        key = (host, family)
+        answer = self._answers.get(key)
+
+        if answer and loop.time() < answer[0]:
+            stats.incr('dns.cached')
+            return await asyncio.shield(answer[1]), True
+
+        future = asyncio.ensure_future(Resolver._query(host, family))
+        if self.ttl:
+            self._answers[key] = (loop.time() + self.ttl, future)
+        stats.incr('dns.lookups')
+
+        try:
+            return await asyncio.shield(future), False
+        except Exception:
+            if self._answers.get(key, (None, None))[1] is future:
+                del self._answers[key]
+            raise
+
+    @staticmethod
+    async def _query(host, family):
+        infos = await asyncio.get_running_loop().getaddrinfo(
+            host, 0, family=family, type=socket.SOCK_STREAM)
+
+        return [(family, proto, address[0]) for family, _, proto, _, address in infos]
+
+    def close(self):
+        """Forget every answer
+
+        Returns:
+
+        """
+        for expires, future in self._answers.values():
+            future.cancel()
+
+        self._answers.clear()
+
+
+class SharedResolver(AbstractResolver):
+    """Lets an aiohttp connector resolve host names with a Resolver
+
+    """
+
+    def __init__(self, resolver: Resolver):
+        self.resolver = resolver
+
+    async def resolve(self, host: str, port: int = 0, family: int = socket.AF_INET) -> list:
+        """Resolve a host name the way aiohttp expects
+
+        Args:
+            host: str host name
+            port: int
+            family: int address family
+
+        Returns: list of dict
+
+        """
+        addresses, cached = await self.resolver.lookup(host, family)
+
+        return [{
+            'hostname': host,
+            'host': address,
+            'port': port,
+            'family': address_family,
+            'proto': proto,
+            'flags': socket.AI_NUMERICHOST | socket.AI_NUMERICSERV
+        } for address_family, proto, address in addresses]
+
+    async def close(self):
+        """The answers belong to the run, so there is nothing to release
+
+        Returns:
+
+        """
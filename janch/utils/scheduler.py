@@ -0,0 +1,132 @@
+"""Contains the scheduler that bounds how many gathers run at the same time
+
+"""
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from urllib.parse import urlparse
+
+from janch.utils import stats
+from janch.utils.constants import DEFAULT_CONCURRENCY_LIMIT, DEFAULT_TYPE_LIMITS, \
+    DEFAULT_HOST_LIMIT
+
+
+def get_host(settings: dict):
+    """Finds the host a gather will talk to, if any
+
+    Args:
+        settings: dict gather section of an item
+
+    Returns: str or None
+
+    """
+    if settings.get('url'):
+        return urlparse(settings['url']).hostname
+
+    return settings.get('host')
+
+
+class Scheduler():
+    """Limits the number of gathers in flight globally, per gatherer type and per host
+
+    A limit of None or 0 means unbounded.
+    """
+
+    def __init__(self, limit: int = None, per_type: dict = None, per_host: int = None):
+        """
+
+        Args:
+            limit: int maximum number of gathers in flight
+            per_type: dict with gatherer types as keys and limits as values
+            per_host: int maximum number of gathers in flight against a single host
+        """
+        self.limit = limit
+        self.per_type = dict(per_type or {})
+        self.per_host = per_host
+
+        self._global = asyncio.Semaphore(limit) if limit else None
+        self._types = {}
+        self._hosts = {}
+
+        self.waiting = 0
+        self.running = 0
+
+    @staticmethod
+    def from_settings(settings: dict = None):
+        """Create a scheduler from the concurrency section of the run settings
+
+        Missing values fall back to the defaults in constants
+
+        Args:
+            settings: dict with optional 'limit', 'per_type' and 'per_host' keys
+
+        Returns: Scheduler
+
+        """
+        settings = settings or {}
+
+        per_type = dict(DEFAULT_TYPE_LIMITS)
+        per_type.update(settings.get('per_type') or {})
+
+        return Scheduler(settings.get('limit', DEFAULT_CONCURRENCY_LIMIT),
+                         per_type,
+                         settings.get('per_host', DEFAULT_HOST_LIMIT))
+
+    def _semaphores(self, type: str, host: str = None) -> list:
+        # Narrowest first so that a gather waiting on a busy host does not hold a global slot
+        ret = []
+
+        if host and self.per_host:
+            if host not in self._hosts:
+                self._hosts[host] = asyncio.Semaphore(self.per_host)
+            ret.append(self._hosts[host])
+
+        if self.per_type.get(type):
+            if type not in self._types:
+                self._types[type] = asyncio.Semaphore(self.per_type[type])
+            ret.append(self._types[type])
+
+        if self._global:
+            ret.append(self._global)
+
+        return ret
+
+    @asynccontextmanager
+    async def slot(self, type: str, host: str = None):
+        """Wait until a gather of the type against the host is allowed to run
+
+        Args:
+            type: str gatherer type
+            host: str host name or None
+
+        Returns:
+
+        """
+        acquired = []
+        started = time.monotonic()
+
+        self.waiting += 1
+        stats.observe('scheduler.queue_depth', self.waiting)
+
+        try:
+            for semaphore in self._semaphores(type, host):
+                await semaphore.acquire()
+                acquired.append(semaphore)
+        except BaseException:
+            for semaphore in reversed(acquired):
+                semaphore.release()
+            raise
+        finally:
+            self.waiting -= 1
+
+        stats.observe('scheduler.wait_ms', (time.monotonic() - started) * 1000)
+
+        self.running += 1
+        stats.observe('scheduler.in_flight', self.running)
+
+        try:
+            yield
+        finally:
+            self.running -= 1
+            for semaphore in reversed(acquired):
+                semaphore.release()
@@ -0,0 +1,143 @@
+"""Contains the http session shared by all http gathers of a run
+
+The engine opens the session at the start of a run and closes it at the end so that
+checks against the same host reuse connections. Host names are resolved with the resolver of
+the run when there is one
+"""
+import asyncio
+
+import aiohttp
+
+from janch.utils import resolver
+from janch.utils.constants import DEFAULT_HTTP_POOL_SIZE, DEFAULT_HOST_LIMIT, DEFAULT_DNS_TTL, \
+    DEFAULT_KEEPALIVE
+
+_state = {
+    'session': None
+}
+
+
+def get_session():
+    """Returns the shared session or None when no run is in progress
+
+    Returns: aiohttp.ClientSession
+
+    """
+    return _state['session']
+
+
+class Timings():
+    """Collects how long the phases of a request took. Pass it as the trace_request_ctx of a
+    request made with a session that uses get_trace_config
+
+    DNS and connect times are 0 when a cached address or an open connection was reused. The
+    connect time includes the TLS handshake as aiohttp does not report the two separately
+    """
+
+    def __init__(self):
+        self.marks = {}
+
+    def mark(self, name: str):
+        """Record the current time under the name
+
+        Args:
+            name: str
+
+        Returns:
+
+        """
+        self.marks[name] = asyncio.get_running_loop().time()
+
+    def _between(self, start: str, end: str):
+        if start not in self.marks or end not in self.marks:
+            return None
+
+        return round((self.marks[end] - self.marks[start]) * 1000, 3)
+
+    def as_fields(self) -> dict:
+        """The timings in milliseconds as gathered fields
+
+        Returns: dict with 'dns_ms', 'connect_ms', 'tls_ms', 'ttfb_ms' and 'total_ms' keys
+
+        """
+        dns = self._between('dns_start', 'dns_end') or 0
+        connect = self._between('connect_start', 'connect_end')
+
+        return {
+            'dns_ms': dns,
+            'connect_ms': round(connect - dns, 3) if connect is not None else 0,
+            'tls_ms': None,
+            'ttfb_ms': self._between('start', 'headers'),
+            'total_ms': self._between('start', 'end')
+        }
+
+
+def get_trace_config() -> aiohttp.TraceConfig:
+    """Returns a trace config that records the phases of requests into their Timings
+
+    Returns: aiohttp.TraceConfig
+
+    """
+
+    def marker(name):
+        async def on_signal(session, trace_config_ctx, params):
+            timings = trace_config_ctx.trace_request_ctx
+            if isinstance(timings, Timings):
+                timings.mark(name)
+
+        return on_signal
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(marker('start'))
+    trace_config.on_dns_resolvehost_start.append(marker('dns_start'))
+    trace_config.on_dns_resolvehost_end.append(marker('dns_end'))
+    trace_config.on_connection_create_start.append(marker('connect_start'))
+    trace_config.on_connection_create_end.append(marker('connect_end'))
+    trace_config.on_request_end.append(marker('headers'))
+
+    return trace_config
+
+
+async def open_session(settings: dict = None):
+    """Create the shared session from the http section of the run settings
+
+    Args:
+        settings: dict with optional 'pool_size', 'per_host', 'dns_ttl' and 'keepalive' keys
+
+    Returns: aiohttp.ClientSession
+
+    """
+    settings = settings or {}
+    keepalive = settings.get('keepalive', DEFAULT_KEEPALIVE)
+    shared = resolver.get_resolver()
+
+    # The shared resolver remembers answers itself, so the connector does not need to
+    if shared:
+        dns = {'resolver': resolver.SharedResolver(shared), 'use_dns_cache': False}
+    else:
+        dns = {'ttl_dns_cache': settings.get('dns_ttl', DEFAULT_DNS_TTL)}
+
+    connector = aiohttp.TCPConnector(
+        limit=settings.get('pool_size', DEFAULT_HTTP_POOL_SIZE),
+        limit_per_host=settings.get('per_host', DEFAULT_HOST_LIMIT),
+        keepalive_timeout=keepalive if keepalive else None,
+        force_close=not keepalive,
+        **dns)
+
+    _state['session'] = aiohttp.ClientSession(connector=connector,
+                                              trace_configs=[get_trace_config()])
+
+    return _state['session']
+
+
+async def close_session():
+    """Close the shared session along with its connections
+
+    Returns:
+
+    """
+    session = _state['session']
+    _state['session'] = None
+
+    if session:
+        await session.close()
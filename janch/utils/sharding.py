@@ -0,0 +1,60 @@
+"""Contains the logic that splits the items of a config between several nodes
+
+Items are assigned using rendezvous hashing on their names so that every node agrees on the
+split without talking to the others, and only about 1/N of the items move when N changes
+"""
+import hashlib
+
+
+def parse(shard: str) -> tuple:
+    """Parse a shard in the form i/N where 1 <= i <= N
+
+    Args:
+        shard: str such as '2/5'
+
+    Returns: tuple (i, N)
+
+    """
+    index, _, count = shard.partition('/')
+
+    try:
+        index, count = int(index), int(count)
+    except ValueError:
+        raise ValueError(f"Expected a shard in the form i/N but got {shard}")
+
+    if not 1 <= index <= count:
+        raise ValueError(f"Shard {shard} is out of range. Shards are numbered 1 to N")
+
+    return index, count
+
+
+def _weight(item: str, shard: int) -> int:
+    digest = hashlib.sha1(f"{shard}:{item}".encode()).digest()
+    return int.from_bytes(digest[:8], 'big')
+
+
+def get_shard(item: str, count: int) -> int:
+    """The shard an item belongs to
+
+    Args:
+        item: str name of the item
+        count: int number of shards
+
+    Returns: int between 1 and count
+
+    """
+    return max(range(1, count + 1), key=lambda shard: _weight(item, shard))
+
+
+def select(config: dict, index: int, count: int) -> dict:
+    """The items of the config that belong to a shard
+
+    Args:
+        config: dict of items
+        index: int the shard, between 1 and count
+        count: int number of shards
+
+    Returns: dict
+
+    """
+    return {item: settings for item, settings in config.items() if get_shard(item, count) == index}
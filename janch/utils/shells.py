@@ -0,0 +1,259 @@
+"""Contains the pool of long lived shells that run the commands of a run
+
+Starting a new shell for every command costs more than most short commands take to run. When
+the run settings have a shells section, the engine opens a pool of shells at the start of a run
+and closes it at the end, and command gatherers hand their commands to it
+"""
+import asyncio
+import os
+import secrets
+import shlex
+import signal
+
+from janch.utils import stats
+from janch.utils.capture import Capture, CHUNK_SIZE
+from janch.utils.constants import DEFAULT_SHELL_POOL_SIZE
+
+_state = {
+    'pool': None
+}
+
+
+def get_pool():
+    """Returns the pool of the run or None when no run is in progress or the pool is not used
+
+    Returns: ShellPool
+
+    """
+    return _state['pool']
+
+
+async def open_pool(settings: dict = None):
+    """Open the pool used by the command gatherers of a run
+
+    Args:
+        settings: dict shells section of the run settings with an optional 'size'. No pool is
+            opened when it is None or the size is 0
+
+    Returns: ShellPool or None
+
+    """
+    await close_pool()
+
+    if settings is None:
+        return None
+
+    size = settings.get('size', DEFAULT_SHELL_POOL_SIZE)
+    if size:
+        _state['pool'] = ShellPool(size)
+
+    return _state['pool']
+
+
+async def close_pool():
+    """Close the pool of the run, stopping its shells
+
+    Returns:
+
+    """
+    pool = _state['pool']
+    _state['pool'] = None
+
+    if pool:
+        await pool.close()
+
+
+class _Stopped(Exception):
+    pass
+
+
+async def _read_frame(stream, end: bytes, capture: Capture) -> bytes:
+    # Feeds the capture until the end marker has been seen and its line is complete. Returns
+    # the rest of the marker line. A last line that may be the start of the marker is held back
+    pending = b''
+
+    while True:
+        chunk = await stream.read(CHUNK_SIZE)
+        if not chunk:
+            raise EOFError("Shell exited")
+
+        pending += chunk
+        index = pending.find(end)
+
+        if index != -1:
+            line_end = pending.find(b'\n', index + len(end))
+            if line_end != -1:
+                capture.feed(pending[:index])
+                return pending[index + len(end):line_end]
+        else:
+            start = pending.rfind(b'\n')
+            if start == -1 or not end.startswith(pending[start:]):
+                start = len(pending)
+
+            if capture.feed(pending[:start]):
+                raise _Stopped()
+            pending = pending[start:]
+
+
+class Shell():
+    """A long lived shell that runs one command at a time
+
+    Every command runs in a subshell with its input from /dev/null so that it can neither
+    change the shell nor read the commands that follow it. After the command, the shell writes
+    a marker that is unique to it followed by the exit status to its stdout, and the marker
+    alone to its stderr, which frames the output of each command
+    """
+
+    def __init__(self, process):
+        self.process = process
+        self.marker = secrets.token_hex(16).encode()
+
+    @staticmethod
+    async def start():
+        """Start a shell in a session of its own
+
+        Returns: Shell
+
+        """
+        process = await asyncio.create_subprocess_exec(
+            '/bin/sh',
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            start_new_session=True)
+
+        stats.incr('shells.started')
+
+        return Shell(process)
+
+    @property
+    def alive(self) -> bool:
+        return self.process.returncode is None
+
+    async def run(self, command: str, stdout: Capture, stderr: Capture):
+        """Run a command
+
+        Args:
+            command: str shell command
+            stdout: Capture for the stdout of the command
+            stderr: Capture for the stderr of the command
+
+        Returns: int exit status or None when stdout stopped before the command finished. The
+            shell is then still busy with the command and must be killed
+
+        """
+        marker = self.marker.decode()
+        script = (f"(eval {shlex.quote(command)}) </dev/null; "
+                  f"printf '\\n{marker} %d\\n' $?; printf '\\n{marker}\\n' >&2\n")
+
+        self.process.stdin.write(script.encode())
+        await self.process.stdin.drain()
+
+        # Both pipes are read together so that a command filling one of them cannot block
+        reads = [
+            asyncio.ensure_future(
+                _read_frame(self.process.stdout, b'\n' + self.marker + b' ', stdout)),
+            asyncio.ensure_future(
+                _read_frame(self.process.stderr, b'\n' + self.marker, stderr))
+        ]
+
+        try:
+            status, _ = await asyncio.gather(*reads)
+        except _Stopped:
+            return None
+        finally:
+            for read in reads:
+                read.cancel()
+
+        return int(status)
+
+    async def kill(self):
+        """Kill the shell along with any command it is running
+
+        Returns:
+
+        """
+        if not self.alive:
+            return
+
+        try:
+            os.killpg(self.process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+        await self.process.wait()
+
+
+class ShellPool():
+    """Runs commands on at most size long lived shells
+
+    Shells are started as they are needed and reused afterwards. A shell is killed when a
+    command it runs is cancelled or fails, and a new one takes its place when needed
+    """
+
+    def __init__(self, size: int):
+        """
+
+        Args:
+            size: int maximum number of shells
+        """
+        self.size = size
+
+        self._slots = asyncio.Semaphore(size)
+        self._idle = []
+        self._shells = set()
+
+    async def run(self, command: str, max_bytes: int = None, stop_on: str = None) -> tuple:
+        """Run a command on an idle shell, waiting for one when all of them are busy
+
+        Args:
+            command: str shell command
+            max_bytes: int maximum number of bytes of each of stdout and stderr that are kept
+            stop_on: str regular expression after a match of which in stdout the command is
+                stopped
+
+        Returns: tuple of stdout Capture, stderr Capture and int exit status, which is None
+            when the command was stopped
+
+        """
+        stdout, stderr = Capture(max_bytes, stop_on), Capture(max_bytes)
+
+        async with self._slots:
+            shell = self._idle.pop() if self._idle else None
+
+            if shell is None:
+                shell = await Shell.start()
+                self._shells.add(shell)
+
+            try:
+                status = await shell.run(command, stdout, stderr)
+            except BaseException:
+                self._shells.discard(shell)
+                await shell.kill()
+                raise
+
+            stats.incr('shells.commands')
+
+            if status is None:
+                self._shells.discard(shell)
+                await shell.kill()
+            else:
+                self._idle.append(shell)
+
+            return stdout, stderr, status
+
+    async def close(self):
+        """Stop every shell of the pool
+
+        Returns:
+
+        """
+        shells = list(self._shells)
+        self._shells.clear()
+        self._idle.clear()
+
+        for shell in shells:
+            if shell.alive:
+                shell.process.stdin.close()
+
+        await asyncio.gather(*[shell.kill() for shell in shells], return_exceptions=True)
@@ -0,0 +1,116 @@
+"""Collects counters and timings during a run so that they can be reported at the end
+
+"""
+from janch.utils.display import FixedWidth
+
+_counters = {}
+_observations = {}
+
+
+def reset():
+    """Forget everything recorded so far. Called at the start of each run
+
+    Returns:
+
+    """
+    _counters.clear()
+    _observations.clear()
+
+
+def incr(name: str, n: int = 1):
+    """Increment a counter
+
+    Args:
+        name: str name of the counter
+        n: int amount to add
+
+    Returns:
+
+    """
+    _counters[name] = _counters.get(name, 0) + n
+
+
+def observe(name: str, value: float):
+    """Record a value such as a wait time. Count, total and max are kept
+
+    Args:
+        name: str name of the observation
+        value: float
+
+    Returns:
+
+    """
+    observed = _observations.setdefault(name, {'count': 0, 'total': 0.0, 'max': None})
+    observed['count'] += 1
+    observed['total'] += value
+    observed['max'] = value if observed['max'] is None else max(observed['max'], value)
+
+
+def get(name: str):
+    """Returns the counter or observation recorded under the name
+
+    Args:
+        name: str
+
+    Returns: int for counters, dict for observations and None if nothing was recorded
+
+    """
+    if name in _counters:
+        return _counters[name]
+
+    return _observations.get(name)
+
+
+def snapshot() -> dict:
+    """Returns a copy of everything recorded so far, for example to send to another process
+
+    Returns: dict
+
+    """
+    return {
+        'counters': dict(_counters),
+        'observations': {k: dict(v) for k, v in _observations.items()}
+    }
+
+
+def merge(recorded: dict):
+    """Add a snapshot taken elsewhere to what has been recorded here
+
+    Args:
+        recorded: dict returned by snapshot
+
+    Returns:
+
+    """
+    for name, n in recorded['counters'].items():
+        incr(name, n)
+
+    for name, other in recorded['observations'].items():
+        observed = _observations.setdefault(name, {'count': 0, 'total': 0.0, 'max': None})
+        observed['count'] += other['count']
+        observed['total'] += other['total']
+        if other['max'] is not None:
+            observed['max'] = other['max'] if observed['max'] is None \
+                else max(observed['max'], other['max'])
+
+
+def summary():
+    """Formats everything recorded in a tabulated manner
+
+    Returns: str, str header and body
+
+    """
+    display = FixedWidth({'stat': 32, 'value': 64})
+
+    for name in sorted(_counters):
+        display.add_row({'stat': name, 'value': _counters[name]})
+
+    for name in sorted(_observations):
+        observed = _observations[name]
+        average = observed['total'] / observed['count'] if observed['count'] else 0
+        display.add_row({
+            'stat': name,
+            'value': f"count={observed['count']} avg={round(average, 2)} max={round(observed['max'], 2)}"
+        })
+
+    return display.get_header(), display.format()
@@ -0,0 +1,74 @@
+"""Gives gatherers access to state they keep between runs
+
+The cache of the run holds state that is only worth keeping as long as the results it belongs to,
+such as ETags of urls. State that must outlive restarts, such as how far a log file has been
+read or the hashes of files, is kept in a sqlite file of its own whatever the type of the cache
+"""
+_state = {
+    'opener': None,
+    'state_opener': None,
+    'state': None
+}
+
+
+def set_opener(opener):
+    """Set by the engine for the duration of a run
+
+    Args:
+        opener: callable returning the Cache of the run, or None at the end of a run
+
+    Returns:
+
+    """
+    _state['opener'] = opener
+
+
+def get_store():
+    """Returns the cache of the run. It is only created when first asked for
+
+    Returns: janch.components.caches.Cache or None when no run is in progress
+
+    """
+    return _state['opener']() if _state['opener'] else None
+
+
+def open_state(opener):
+    """Set by the engine for the duration of a run
+
+    Args:
+        opener: callable returning the persistent Cache, or None at the end of a run
+
+    Returns:
+
+    """
+    _state['state_opener'] = opener
+    _state['state'] = None
+
+
+def get_state():
+    """Returns the persistent state. It is only opened when first asked for
+
+    Returns: janch.components.caches.Cache or None when no run is in progress
+
+    """
+    if _state['state_opener'] is None:
+        return None
+
+    if _state['state'] is None:
+        _state['state'] = _state['state_opener']()
+
+    return _state['state']
+
+
+async def close_state():
+    """Close the persistent state of the run
+
+    Returns:
+
+    """
+    state = _state['state']
+    _state['state_opener'] = None
+    _state['state'] = None
+
+    if state:
+        await state.close()
@@ -0,0 +1,138 @@
+"""Contains the long running mode of Janch where each item is re-run on its own interval
+
+"""
+import asyncio
+import heapq
+import itertools
+import random
+
+from janch.utils import context, engine, stats
+from janch.utils.constants import DEFAULT_INTERVAL, DEFAULT_JITTER
+
+
+class Watcher():
+    """Re-runs items on their intervals using a heap ordered by the time each item is due
+
+    Only the earliest due time is waited on so idle items cost nothing between runs
+    """
+
+    def __init__(self, config: dict, interval: float = None, jitter: float = None):
+        """
+
+        Args:
+            config: dict of items to run. An item may set its own 'interval' in seconds
+            interval: float seconds between runs of items that do not set their own interval
+            jitter: float fraction of the interval by which each run is randomly moved
+        """
+        self.config = config
+        self.interval = interval or DEFAULT_INTERVAL
+        self.jitter = DEFAULT_JITTER if jitter is None else jitter
+        self.counts = {item: 0 for item in config}
+
+        self._heap = []
+        self._sequence = itertools.count()
+        self._running = {}
+
+    def get_interval(self, item) -> float:
+        """Seconds between runs of an item
+
+        Args:
+            item: str name of the item
+
+        Returns: float
+
+        """
+        return self.config[item].get('interval') or self.interval
+
+    def _spread(self, interval) -> float:
+        return random.uniform(-self.jitter, self.jitter) * interval
+
+    def schedule(self, item, due: float):
+        """Put an item on the heap to be run at the due loop time
+
+        Args:
+            item: str name of the item
+            due: float loop time
+
+        Returns:
+
+        """
+        heapq.heappush(self._heap, (due, next(self._sequence), item))
+
+    async def _tick(self, item):
+        try:
+            await engine.start_item(item, self.config[item])
+        except Exception as e:
+            stats.incr('watch.failed')
+            await engine.log(f"{item} failed: {e!r}")
+        finally:
+            self._running.pop(item, None)
+
+    async def run(self, until: float = None):
+        """Keep running items as they become due
+
+        Args:
+            until: float seconds after which to stop. Runs forever when None
+
+        Returns:
+
+        """
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        stop_at = now + until if until is not None else None
+
+        # The first runs are spread over the jitter window so that items do not start together
+        for item in self.config:
+            interval = self.get_interval(item)
+            self.schedule(item, now + abs(self._spread(interval)))
+
+        try:
+            while self._heap:
+                due, _, item = self._heap[0]
+
+                if stop_at is not None and due > stop_at:
+                    await asyncio.sleep(max(stop_at - loop.time(), 0))
+                    break
+
+                delay = due - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                    continue
+
+                heapq.heappop(self._heap)
+                interval = self.get_interval(item)
+                self.schedule(item, due + interval + self._spread(interval))
+
+                # An item still running from its previous tick is not started again
+                if item in self._running:
+                    stats.incr('watch.skipped')
+                    continue
+
+                self.counts[item] += 1
+                self._running[item] = asyncio.ensure_future(self._tick(item))
+        finally:
+            running = list(self._running.values())
+            for task in running:
+                task.cancel()
+            await asyncio.gather(*running, return_exceptions=True)
+
+
+async def watch(config: dict = None, until: float = None):
+    """Run the items of the config repeatedly with the run settings' interval and jitter
+
+    Args:
+        config: dict of items to run. Defaults to the initialized config
+        until: float seconds after which to stop. Runs forever when None
+
+    Returns: Watcher
+
+    """
+    config = context.config if config is None else config
+    watcher = Watcher(config, context.settings.get('interval'), context.settings.get('jitter'))
+
+    async with engine.resources(repeating=True, config=config):
+        await watcher.run(until)
+
+    await engine.report()
+
+    return watcher
@@ -0,0 +1,144 @@
+"""Contains the logic that splits a run across several processes
+
+Each worker process runs its share of the items on its own event loop, including inspection
+and formatting, and streams the formatted results back to the parent which logs them in the
+order of the config
+"""
+import asyncio
+import multiprocessing
+import queue as queues
+
+from janch.utils import context, engine, stats, plan
+from janch.utils.constants import WORKER_DIED
+
+# Seconds the parent waits for a result before checking that the workers are still alive
+_POLL_INTERVAL = 0.5
+
+
+def partition(config: dict, count: int) -> list:
+    """Deal the items of the config out to count parts in turn
+
+    Args:
+        config: dict of items
+        count: int number of parts
+
+    Returns: list of dicts
+
+    """
+    parts = [{} for _ in range(count)]
+
+    for i, (item, settings) in enumerate(config.items()):
+        parts[i % count][item] = settings
+
+    return parts
+
+
+def _portable(value):
+    # Gathered data may hold objects such as exceptions that cannot cross processes
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+
+    if isinstance(value, dict):
+        return {k: _portable(v) for k, v in value.items()}
+
+    if isinstance(value, (list, tuple)):
+        return [_portable(v) for v in value]
+
+    return str(value)
+
+
+async def _stream(results):
+    async for result in engine.iter_results():
+        results.put((result.item, _portable(result.gathered), _portable(result.inspected),
+                     result.header, result.body))
+
+
+def _work(components: dict, config: dict, results):
+    context.gatherers.update(components['gatherers'])
+    context.inspectors.update(components['inspectors'])
+    context.formatters.update(components['formatters'])
+    context.loggers.update(components['loggers'])
+    context.caches.update(components['caches'])
+    context.settings.update(components['settings'])
+    context.environment.update(components['environment'])
+    context.config.clear()
+    context.config.update(config)
+    context.plan.clear()
+    context.plan.update(plan.compile(config, context.inspectors))
+
+    try:
+        asyncio.run(_stream(results))
+    finally:
+        results.put((None, stats.snapshot()))
+
+
+async def start(count: int, config: dict = None):
+    """Run the items of the config across count worker processes
+
+    Args:
+        count: int number of worker processes
+        config: dict of items to run. Defaults to the initialized config
+
+    Returns:
+
+    """
+    config = context.config if config is None else config
+    loop = asyncio.get_running_loop()
+
+    components = {
+        'gatherers': dict(context.gatherers),
+        'inspectors': dict(context.inspectors),
+        'formatters': dict(context.formatters),
+        'loggers': dict(context.loggers),
+        'caches': dict(context.caches),
+        'settings': dict(context.settings),
+        'environment': dict(context.environment)
+    }
+
+    results = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=_work, args=(components, part, results), daemon=True)
+                 for part in partition(config, count) if part]
+
+    for process in processes:
+        process.start()
+
+    stats.reset()
+    order = list(config)
+    pending = {}
+    finished = 0
+
+    try:
+        while finished < len(processes):
+            try:
+                received = await loop.run_in_executor(None, results.get, True, _POLL_INTERVAL)
+            except queues.Empty:
+                if not any(process.is_alive() for process in processes) and results.empty():
+                    break
+                continue
+
+            if received[0] is None:
+                finished += 1
+                stats.merge(received[1])
+                continue
+
+            item, gathered, inspected, header, body = received
+            pending[item] = engine.Result(item, config[item], gathered, inspected, header, body)
+
+            # Log every result whose predecessors in the config have all been logged
+            while order and order[0] in pending:
+                await engine.emit(pending.pop(order.pop(0)))
+    finally:
+        for process in processes:
+            process.join(_POLL_INTERVAL)
+            if process.is_alive():
+                process.terminate()
+
+    # Items lost with a worker that died are reported as failed, in the order of the config
+    for item in order:
+        if item in pending:
+            await engine.emit(pending.pop(item))
+        else:
+            stats.incr('workers.lost')
+            await engine.emit(await engine.fail_item(item, config[item], WORKER_DIED))
+
+    await engine.report()
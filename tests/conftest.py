@@ -0,0 +1,71 @@
+import asyncio
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from janch.components import *
+from janch.utils import context
+
+
+@pytest.fixture(autouse=True)
+def janch_context():
+    """Populate the context with the default components and empty run settings"""
+    context.settings.clear()
+    context.gatherers.update(get_default_gatherers())
+    context.inspectors.update(get_default_inspectors())
+    context.formatters.update(get_default_formatters())
+    context.loggers.update(get_default_loggers())
+    context.caches.update(get_default_caches())
+
+    yield context
+
+    context.settings.clear()
+
+
+@pytest_asyncio.fixture
+async def http_server():
+    """A local http server. Returns its url which answers with 100000 bytes of x
+
+    The etag path answers with 304 when the request carries its ETag. The small path answers
+    with a short body sent in two parts and the peers path with the number of connections it was requested on
+    """
+    peers = set()
+
+    async def body(request):
+        return web.Response(text='x' * 100000)
+
+    async def etag(request):
+        if request.headers.get('If-None-Match') == '"v1"':
+            return web.Response(status=304)
+        return web.Response(text='versioned', headers={'ETag': '"v1"'})
+
+    async def small(request):
+        # The body is sent in two parts so that it is still arriving when the headers are read
+        peers.add(request.transport.get_extra_info('peername'))
+        response = web.StreamResponse(headers={'Content-Length': '10'})
+        await response.prepare(request)
+        await response.write(b'x' * 5)
+        await asyncio.sleep(0.01)
+        await response.write(b'x' * 5)
+        await response.write_eof()
+        return response
+
+    async def count_peers(request):
+        return web.Response(text=str(len(peers)))
+
+    app = web.Application()
+    app.router.add_get('/', body)
+    app.router.add_get('/etag', etag)
+    app.router.add_get('/small', small)
+    app.router.add_get('/peers', count_peers)
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+
+    port = site._server.sockets[0].getsockname()[1]
+
+    yield f"http://127.0.0.1:{port}/"
+
+    await runner.cleanup()
@@ -0,0 +1,35 @@
+import pytest
+from janch.components.caches import MemoryCache, SqliteCache
+
+
+@pytest.mark.asyncio
+async def test_memory_cache_expires_and_evicts():
+    cache = MemoryCache({'size': 2})
+
+    await cache.set('a', {'status': 200}, 60)
+    await cache.set('b', {'status': 201}, 60)
+    await cache.get('a')
+    await cache.set('c', {'status': 202}, 60)
+
+    assert await cache.get('a') == {'status': 200}
+    assert await cache.get('b') is None
+
+    await cache.set('expired', {'status': 203}, -1)
+
+    assert await cache.get('expired') is None
+
+
+@pytest.mark.asyncio
+async def test_sqlite_cache_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / 'cache.sqlite')
+    first = SqliteCache({'path': path})
+
+    await first.set('key', {'result': 'hello', 'error': 'NOERROR'}, 60)
+    await first.set('expired', {'result': 'bye'}, -1)
+    await first.close()
+
+    second = SqliteCache({'path': path})
+
+    assert await second.get('key') == {'result': 'hello', 'error': 'NOERROR'}
+    assert await second.get('expired') is None
+    await second.close()
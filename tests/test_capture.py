@@ -0,0 +1,30 @@
+from janch.utils.capture import Capture
+
+
+def test_capture_keeps_head_and_tail():
+    capture = Capture(10)
+
+    for chunk in [b'0123', b'4567', b'89ab', b'cdef']:
+        capture.feed(chunk)
+
+    assert capture.size == 16
+    assert capture.truncated
+    assert capture.getvalue() == b'01234\n[6 bytes truncated]\nbcdef'
+
+
+def test_capture_is_unbounded_without_max_bytes():
+    capture = Capture()
+    capture.feed(b'a' * 100)
+
+    assert not capture.truncated
+    assert capture.getvalue() == b'a' * 100
+
+
+def test_capture_stops_on_a_match_across_chunks():
+    capture = Capture(stop_on='done')
+
+    assert not capture.feed(b'still working, do')
+    assert capture.feed(b'ne\nmore')
+    assert capture.stopped
+    assert capture.feed(b'ignored')
+    assert capture.size == 24
@@ -0,0 +1,75 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+from janch.components.gatherers import DbGatherer
+from janch.utils import databases, engine, stats
+
+
+@pytest.fixture
+def dsn(tmp_path):
+    path = tmp_path / 'app.db'
+    connection = sqlite3.connect(path)
+    connection.execute('CREATE TABLE jobs (name TEXT, state TEXT)')
+    connection.executemany('INSERT INTO jobs VALUES (?, ?)',
+                           [('backup', 'done'), ('report', 'failed'), ('sync', 'done')])
+    connection.commit()
+    connection.close()
+
+    return f"sqlite:///{path}"
+
+
+@pytest.mark.asyncio
+async def test_db_gatherer_without_a_run(dsn):
+    gatherer = DbGatherer({'dsn': dsn, 'query': "SELECT name, state FROM jobs WHERE state = 'done'"})
+
+    result = await gatherer.gather()
+
+    assert result['row_count'] == 2
+    assert result['first_row'] == {'name': 'backup', 'state': 'done'}
+    assert result['error'] == 'NOERROR'
+
+
+@pytest.mark.asyncio
+async def test_db_items_of_a_run_share_connections(dsn, janch_context):
+    janch_context.settings['db'] = {'pool_size': 2}
+    config = {f"query{i}": {'gather': {'type': 'db', 'dsn': dsn,
+                                       'query': f"SELECT count(*) AS n, {i} FROM jobs"}}
+              for i in range(10)}
+    config['bad'] = {'gather': {'type': 'db', 'dsn': dsn, 'query': 'SELECT * FROM missing'}}
+    config['unsupported'] = {'gather': {'type': 'db', 'dsn': 'mysql://db/app', 'query': 'SELECT 1'}}
+
+    results = {result.item: result.gathered async for result in engine.iter_results(config)}
+
+    assert all(results[f"query{i}"]['first_row']['n'] == 3 for i in range(10))
+    assert 'no such table' in results['bad']['error']
+    assert 'Unsupported' in results['unsupported']['error']
+    assert stats.get('db.connections') <= 2
+    assert databases.get_pool(dsn) is None
+
+
+@pytest.mark.asyncio
+async def test_slow_queries_are_interrupted(dsn):
+    pool = databases.ConnectionPool(dsn, 1)
+    slow = ("WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n) "
+            "SELECT count(*) FROM n")
+
+    try:
+        with pytest.raises(asyncio.TimeoutError):
+            await pool.query(slow, 0.2)
+
+        assert (await pool.query('SELECT count(*) FROM jobs'))[1] == (3,)
+    finally:
+        await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_missing_databases_are_not_created(tmp_path):
+    path = tmp_path / 'missing.db'
+    gatherer = DbGatherer({'dsn': f"sqlite:///{path}", 'query': 'SELECT 1'})
+
+    result = await gatherer.gather()
+
+    assert 'unable to open database file' in result['error']
+    assert not path.exists()
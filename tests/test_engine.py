@@ -0,0 +1,321 @@
+import asyncio
+import socket
+
+import aiohttp
+import pytest
+from janch.components.gatherers import CommandGatherer
+from janch.utils import context, engine, sessions, stats
+from janch.utils.constants import TIMED_OUT, CIRCUIT_OPEN
+
+
+@pytest.mark.asyncio
+async def test_resources_share_session():
+    context.settings.update({'http': {'pool_size': 4, 'per_host': 2, 'keepalive': 0}})
+
+    async with engine.resources():
+        session = sessions.get_session()
+        assert session is not None
+        assert session.connector.limit == 4
+        assert session.connector.limit_per_host == 2
+
+    assert session.closed
+    assert sessions.get_session() is None
+
+
+@pytest.mark.asyncio
+async def test_iter_results_in_completion_order():
+    context.settings.update({'concurrency': {'per_type': {'command': 2}}})
+
+    config = {
+        'slow': {'gather': {'type': 'command', 'command_str': 'sleep 0.3; echo slow'},
+                 'inspect': {'result': 'slow'}},
+        'fast': {'gather': {'type': 'command', 'command_str': 'echo fast'},
+                 'inspect': {'result': 'slow'}}
+    }
+
+    results = [result async for result in engine.iter_results(config)]
+
+    assert [r.item for r in results] == ['fast', 'slow']
+    assert results[0].gathered['result'] == 'fast'
+    assert not results[0].matched
+    assert results[1].matched
+    assert 'slow' in results[1].body
+
+
+@pytest.mark.asyncio
+async def test_timeout_and_deadline():
+    context.settings.update({'deadline': 0.5, 'concurrency': {'per_type': {'command': 4}}})
+
+    config = {
+        'hung': {'gather': {'type': 'command', 'command_str': 'sleep 30', 'timeout': 0.1}},
+        'late': {'gather': {'type': 'command', 'command_str': 'sleep 30'}},
+        'quick': {'gather': {'type': 'command', 'command_str': 'echo quick'}}
+    }
+
+    results = {result.item: result async for result in engine.iter_results(config)}
+
+    assert results['hung'].gathered['error'] == TIMED_OUT
+    assert results['late'].gathered['error'] == TIMED_OUT
+    assert results['quick'].gathered['result'] == 'quick'
+    assert results['quick'].matched
+
+
+@pytest.mark.asyncio
+async def test_identical_gathers_are_coalesced(tmp_path):
+    counter = tmp_path / 'counter'
+    command = f"echo run >> {counter}; echo hello"
+
+    config = {
+        'first': {'gather': {'type': 'command', 'command_str': command},
+                  'inspect': {'result': 'hello'}},
+        'second': {'gather': {'type': 'command', 'command_str': command},
+                   'inspect': {'result': 'bye'}},
+        'other': {'gather': {'type': 'command', 'command_str': 'echo other'}}
+    }
+
+    results = {result.item: result async for result in engine.iter_results(config)}
+
+    assert counter.read_text().count('run') == 1
+    assert results['first'].matched
+    assert not results['second'].matched
+    assert results['first'].gathered is not results['second'].gathered
+    assert stats.get('gathers.coalesced') == 1
+    assert stats.get('gathers.run') == 2
+
+
+@pytest.mark.asyncio
+async def test_cache_ttl_skips_gathering_again(tmp_path):
+    counter = tmp_path / 'counter'
+    context.settings.update({'cache': {'type': 'sqlite', 'path': str(tmp_path / 'cache.sqlite')}})
+
+    config = {'cached': {'gather': {'type': 'command', 'cache_ttl': 60,
+                                    'command_str': f"echo run >> {counter}; echo hello"}}}
+
+    first = [result async for result in engine.iter_results(config)]
+    assert stats.get('cache.misses') == 1
+
+    second = [result async for result in engine.iter_results(config)]
+    assert stats.get('cache.hits') == 1
+
+    assert counter.read_text().count('run') == 1
+    assert second[0].gathered['result'] == first[0].gathered['result'] == 'hello'
+
+
+@pytest.mark.asyncio
+async def test_retries_and_circuit_breaker():
+    context.settings.update({'circuit': {'threshold': 2, 'reset': 60},
+                             'concurrency': {'per_host': 1}})
+    retry = {'count': 2, 'backoff': 0}
+
+    # Nothing listens on port 9 of localhost so every attempt fails
+    config = {f"down-{i}": {'gather': {'type': 'http', 'url': f"http://127.0.0.1:9/{i}", 'retry': retry}}
+              for i in range(4)}
+
+    results = [result async for result in engine.iter_results(config)]
+    errors = [result.gathered['error'] for result in results]
+
+    # The first two items trip the breaker, so their retries and the other items are refused.
+    # Items whose retry was refused keep the error of the attempt that failed
+    assert errors.count(CIRCUIT_OPEN) == 2
+    assert all('ConnectionRefused' in repr(e) for e in errors if e != CIRCUIT_OPEN)
+    assert stats.get('retries') == 2
+    assert stats.get('circuit.short_circuited') == 4
+
+
+@pytest.mark.asyncio
+async def test_gatherers_only_gather_inspected_fields(http_server):
+    config = {
+        'status': {'gather': {'type': 'http', 'url': http_server}, 'inspect': {'status': 200}},
+        'body': {'gather': {'type': 'http', 'url': http_server}, 'inspect': {'html': 'x+'}},
+        'other': {'gather': {'type': 'http', 'url': http_server + '?status-only'},
+                  'inspect': {'status': 200}}
+    }
+
+    results = {result.item: result async for result in engine.iter_results(config)}
+
+    assert results['status'].gathered['html'].startswith('x')
+    assert results['body'].matched
+    assert 'html' not in results['other'].gathered
+    assert results['other'].matched
+
+
+@pytest.mark.asyncio
+async def test_status_only_items_reuse_connections(http_server):
+    context.settings.update({'http': {'per_host': 1}})
+    config = {f"status-{i}": {'gather': {'type': 'http', 'url': f"{http_server}small?{i}"},
+                              'inspect': {'status': 200}} for i in range(20)}
+
+    results = [result async for result in engine.iter_results(config)]
+
+    async with aiohttp.ClientSession() as session:
+        async with session.get(http_server + 'peers') as response:
+            connections = int(await response.text())
+
+    assert all(result.matched for result in results)
+    assert all(result.gathered['body_bytes'] == 10 for result in results)
+    assert connections == 1
+
+
+@pytest.mark.asyncio
+async def test_revalidated_items_reuse_the_body_when_not_modified(http_server):
+    context.settings.update({'cache': {'type': 'memory'}})
+    config = {'versioned': {'gather': {'type': 'http', 'url': http_server + 'etag', 'revalidate': True},
+                            'inspect': {'html': 'versioned'}}}
+
+    async with engine.resources(repeating=True, config=config):
+        first = await engine.run_item('versioned', config['versioned'])
+        second = await engine.run_item('versioned', config['versioned'])
+
+    assert first.gathered['not_modified'] is False
+    assert second.gathered['not_modified'] is True
+    assert second.gathered['html'] == 'versioned'
+    assert second.gathered['body_bytes'] == len('versioned')
+    assert second.inspected is first.inspected
+    assert stats.get('http.not_modified') == 1
+
+
+@pytest.mark.asyncio
+async def test_grep_items_on_the_same_file_are_searched_together(tmp_path):
+    log = tmp_path / 'app.log'
+    log.write_text("ERROR one\nWARN two\nERROR WARN three\n")
+
+    config = {
+        'errors': {'gather': {'type': 'grep', 'filepath': str(log), 'search': 'ERROR'}},
+        'warnings': {'gather': {'type': 'grep', 'filepath': str(log), 'search': 'WARN'}},
+        'invalid': {'gather': {'type': 'grep', 'filepath': str(log), 'search': '('}},
+        'missing': {'gather': {'type': 'grep', 'filepath': str(tmp_path / 'none'), 'search': 'x'}}
+    }
+
+    results = {result.item: result.gathered async for result in engine.iter_results(config)}
+
+    assert results['errors']['line_count'] == 2
+    assert results['warnings']['result'] == "WARN two\nERROR WARN three"
+    assert results['invalid']['error'] != 'NOERROR'
+    assert results['missing']['error'] != 'NOERROR'
+    assert stats.get('batch.calls') == 1
+    assert stats.get('batch.requests') == 4
+
+
+@pytest.mark.asyncio
+async def test_incremental_grep_positions_survive_a_restart(tmp_path):
+    context.settings.update({'cache': {'type': 'memory', 'size': 1},
+                             'state': {'path': str(tmp_path / 'state.sqlite')}})
+    log = tmp_path / 'app.log'
+    log.write_text("ERROR one\n")
+    config = {'errors': {'gather': {'type': 'grep', 'filepath': str(log), 'search': 'ERROR',
+                                    'incremental': True}}}
+
+    async with engine.resources(repeating=True, config=config):
+        first = await engine.run_item('errors', config['errors'])
+
+    with open(log, 'a') as f:
+        f.write("ERROR two\n")
+
+    # A new watch starts with an empty memory cache but keeps the position in the file
+    async with engine.resources(repeating=True, config=config):
+        second = await engine.run_item('errors', config['errors'])
+
+    assert first.gathered['new_match_count'] == 1
+    assert second.gathered['new_match_count'] == 1
+    assert second.gathered['result'] == 'ERROR two'
+
+
+@pytest.mark.asyncio
+async def test_tcp_items_fan_out_within_the_host_limit(janch_context):
+    server = await asyncio.start_server(lambda reader, writer: writer.close(), '127.0.0.1', 0)
+    port = server.sockets[0].getsockname()[1]
+    janch_context.settings['concurrency'] = {'per_host': 4}
+
+    config = {f"port{i}": {'gather': {'type': 'tcp', 'host': '127.0.0.1', 'port': port,
+                                      'timeout': 5 + i}}
+              for i in range(20)}
+
+    async with server:
+        results = [result async for result in engine.iter_results(config)]
+
+    assert len(results) == 20
+    assert all(result.gathered['connected'] for result in results)
+    assert stats.get('scheduler.in_flight')['max'] <= 4
+
+
+@pytest.mark.asyncio
+async def test_batches_still_running_at_the_deadline_are_cancelled(janch_context):
+    ended = []
+
+    class SlowGatherer(CommandGatherer):
+        @staticmethod
+        def type():
+            return 'slow'
+
+        @classmethod
+        async def gather_many(cls, settings_list):
+            try:
+                await asyncio.sleep(5)
+            finally:
+                ended.append(asyncio.get_running_loop().time())
+            return [{} for _ in settings_list]
+
+    janch_context.gatherers['slow'] = SlowGatherer
+    janch_context.settings['deadline'] = 0.1
+    config = {name: {'gather': {'type': 'slow', 'command_str': name}} for name in 'ab'}
+
+    results = [result async for result in engine.iter_results(config)]
+    returned = asyncio.get_running_loop().time()
+
+    assert [result.gathered['error'] for result in results] == [TIMED_OUT, TIMED_OUT]
+    assert len(ended) == 1 and ended[0] <= returned
+
+
+@pytest.mark.asyncio
+async def test_gatherers_overriding_gather_many_get_all_waiting_items(janch_context):
+    calls = []
+
+    class EchoGatherer(CommandGatherer):
+        @staticmethod
+        def type():
+            return 'echo'
+
+        @classmethod
+        async def gather_many(cls, settings_list):
+            calls.append([settings['command_str'] for settings in settings_list])
+            return [cls(settings).finish({'result': settings['command_str']})
+                    for settings in settings_list]
+
+    janch_context.gatherers['echo'] = EchoGatherer
+    config = {name: {'gather': {'type': 'echo', 'command_str': name}} for name in 'abc'}
+
+    results = {result.item: result.gathered async for result in engine.iter_results(config)}
+
+    assert calls == [['a', 'b', 'c']]
+    assert results['b'] == {'result': 'b', 'error': 'NOERROR'}
+    assert EchoGatherer.gathers_many() and not CommandGatherer.gathers_many()
+
+    gathered = await CommandGatherer.gather_many([{'command_str': 'echo one'},
+                                                  {'command_str': 'echo two'}])
+    assert [g['result'] for g in gathered] == ['one', 'two']
+
+
+@pytest.mark.asyncio
+async def test_closed_ports_do_not_open_the_circuit_of_other_ports(janch_context):
+    server = await asyncio.start_server(lambda reader, writer: writer.close(), '127.0.0.1', 0)
+    port = server.sockets[0].getsockname()[1]
+    janch_context.settings['circuit'] = {'threshold': 2, 'reset': 60}
+    janch_context.settings['concurrency'] = {'per_host': 1}
+
+    closed = socket.socket()
+    closed.bind(('127.0.0.1', 0))
+    closed_port = closed.getsockname()[1]
+    closed.close()
+
+    # Items run in config order with one at a time against the host
+    config = {f"closed{i}": {'gather': {'type': 'tcp', 'host': '127.0.0.1', 'port': closed_port,
+                                        'timeout': 5 + i}}
+              for i in range(6)}
+    config['open'] = {'gather': {'type': 'tcp', 'host': '127.0.0.1', 'port': port}}
+
+    async with server:
+        results = {result.item: result.gathered async for result in engine.iter_results(config)}
+
+    assert results['open']['connected']
+    assert results['open']['error'] == 'NOERROR'
+    assert [results[f"closed{i}"]['error'] == CIRCUIT_OPEN for i in range(6)].count(True) == 4
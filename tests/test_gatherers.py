@@ -1,5 +1,10 @@
+import asyncio
+import hashlib
+import socket
+
 import pytest
-from janch.components.gatherers import HttpGatherer, CommandGatherer, GrepGatherer
+from janch.components.gatherers import HttpGatherer, CommandGatherer, GrepGatherer, TcpGatherer
+from janch.utils import engine, grep, stats
 
 
 @pytest.mark.asyncio
@@ -38,3 +43,195 @@ async def test_grep_gatherer(tmp_path):
     assert "Hello=world" in result['result']
     assert result['line_count'] == 2
     assert result['error'] == 'NOERROR'
+
+
+@pytest.mark.asyncio
+async def test_http_gatherer_reads_body_only_when_needed(http_server):
+    status_only = HttpGatherer({"url": http_server})
+    status_only.fields = {'status', 'error'}
+
+    result = await status_only.gather()
+
+    assert result['status'] == 200
+    assert result['headers']['Content-Type'].startswith('text/plain')
+    assert 'html' not in result
+    assert result['body_bytes'] == 100000
+
+    capped = HttpGatherer({"url": http_server, "max_body_bytes": 10})
+
+    result = await capped.gather()
+
+    assert result['html'] == 'x' * 10
+    assert result['truncated'] is True
+    assert result['body_bytes'] == 10
+    assert result['connect_ms'] >= 0
+    assert 0 <= result['ttfb_ms'] <= result['total_ms']
+
+
+@pytest.mark.asyncio
+async def test_grep_gatherer_counts_exactly(tmp_path):
+    file_path = tmp_path / "test.log"
+    file_path.write_text("ok\nERROR one\nok\nERROR two\nERROR three")
+
+    settings = {"filepath": str(file_path), "search": "^ERROR", "max_lines": 2}
+    result = await GrepGatherer(settings).gather()
+
+    assert result['result'] == "ERROR one\nERROR two"
+    assert result['line_count'] == 3
+
+    result = await GrepGatherer({"filepath": str(file_path), "search": "missing"}).gather()
+
+    assert result['result'] == ''
+    assert result['line_count'] == 0
+    assert result['error'] == 'NOERROR'
+
+    # A match may not run over the end of a line
+    result = await GrepGatherer({"filepath": str(file_path), "search": "ok\\sERROR"}).gather()
+
+    assert result['line_count'] == 0
+
+
+@pytest.mark.asyncio
+async def test_grep_gatherer_reads_files_without_a_size():
+    # /proc files report a size of 0 and cannot be memory mapped
+    result = await GrepGatherer({"filepath": "/proc/meminfo", "search": "^MemTotal:"}).gather()
+
+    assert result['line_count'] == 1
+    assert result['result'].startswith('MemTotal:')
+
+    found = grep.search_file_many('/proc/meminfo', [grep.compile('^MemTotal:'),
+                                                    grep.compile('^MemFree:')])
+
+    assert [count for lines, count in found] == [1, 1]
+
+
+def test_grep_search_file_many_keeps_backreferences(tmp_path):
+    file_path = tmp_path / "test_file.txt"
+    file_path.write_text("aa\nab\nxy\n")
+    patterns = [grep.compile(r"(x)y"), grep.compile(r"(a)\1")]
+
+    found = grep.search_file_many(str(file_path), patterns)
+
+    assert found == [grep.search_file(str(file_path), pattern) for pattern in patterns]
+    assert found[1] == (['aa'], 1)
+
+
+def test_grep_search_appended_handles_growth_and_rotation(tmp_path):
+    log = tmp_path / "app.log"
+    log.write_text("ERROR old\nok\n")
+    pattern = grep.compile("ERROR")
+
+    lines, count, position = grep.search_appended(str(log), pattern)
+    assert (lines, count) == (['ERROR old'], 1)
+
+    # The line still being written is left for the next search
+    with open(log, 'a') as f:
+        f.write("ERROR new\nERROR partial")
+
+    lines, count, position = grep.search_appended(str(log), pattern, position)
+    assert (lines, count) == (['ERROR new'], 1)
+
+    with open(log, 'a') as f:
+        f.write(" line\n")
+
+    lines, count, position = grep.search_appended(str(log), pattern, position)
+    assert (lines, count) == (['ERROR partial line'], 1)
+
+    # Truncation starts the search over
+    log.write_text("ERROR after truncation\n")
+
+    lines, count, position = grep.search_appended(str(log), pattern, position)
+    assert count == 1
+
+
+def test_grep_search_appended_reads_lines_across_chunks(tmp_path, monkeypatch):
+    monkeypatch.setattr(grep, 'CHUNK_SIZE', 4)
+    log = tmp_path / "app.log"
+    log.write_text("ok\nERROR one\nfine\nERROR two\nERROR partial")
+    pattern = grep.compile("ERROR")
+
+    lines, count, position = grep.search_appended(str(log), pattern, max_lines=1)
+
+    assert (lines, count) == (['ERROR one'], 2)
+    assert position['offset'] == len("ok\nERROR one\nfine\nERROR two\n")
+
+
+@pytest.mark.asyncio
+async def test_command_gatherer_bounds_output():
+    settings = {"command_str": "head -c 100000 /dev/zero | tr '\\0' x; echo oops >&2",
+                "max_output_bytes": 100}
+    gatherer = CommandGatherer(settings)
+
+    result = await gatherer.gather()
+
+    assert result['truncated']
+    assert result['output_bytes'] == 100000
+    assert result['result'] == 'x' * 50 + '\n[99900 bytes truncated]\n' + 'x' * 50
+    assert result['error'] == 'oops'
+
+
+@pytest.mark.asyncio
+async def test_command_gatherer_stops_on_match():
+    settings = {"command_str": "echo ready; sleep 10", "stop_on": "ready"}
+    gatherer = CommandGatherer(settings)
+
+    result = await gatherer.gather()
+
+    assert result['result'] == 'ready'
+    assert result['exit_status'] is None
+    assert result['error'] == 'NOERROR'
+
+
+@pytest.mark.asyncio
+async def test_tcp_gatherer():
+    async def greet(reader, writer):
+        writer.write(b"220 ready\r\n")
+        await writer.drain()
+        writer.close()
+
+    server = await asyncio.start_server(greet, '127.0.0.1', 0)
+    port = server.sockets[0].getsockname()[1]
+
+    closed = socket.socket()
+    closed.bind(('127.0.0.1', 0))
+    closed_port = closed.getsockname()[1]
+    closed.close()
+
+    try:
+        async with server:
+            result = await TcpGatherer({'host': '127.0.0.1', 'port': port, 'banner': True}).gather()
+            refused = await TcpGatherer({'host': '127.0.0.1', 'port': closed_port}).gather()
+    finally:
+        server.close()
+
+    assert result['connected']
+    assert result['connect_ms'] >= 0
+    assert result['banner'] == '220 ready'
+    assert result['error'] == 'NOERROR'
+    assert not refused['connected']
+    assert refused['error'] != 'NOERROR'
+
+
+@pytest.mark.asyncio
+async def test_file_gatherer_reuses_hashes_of_unchanged_files(tmp_path, janch_context):
+    path = tmp_path / 'app.conf'
+    path.write_bytes(b'port=8080\n')
+    path.chmod(0o640)
+    # Hashes outlive the memory cache of each run
+    janch_context.settings['cache'] = {'type': 'memory'}
+    janch_context.settings['state'] = {'path': str(tmp_path / 'state.sqlite')}
+    config = {'conf': {'gather': {'type': 'file', 'path': str(path), 'hash': True}},
+              'missing': {'gather': {'type': 'file', 'path': str(tmp_path / 'none')}}}
+
+    first = {result.item: result.gathered async for result in engine.iter_results(config)}
+    hashed = stats.get('file.hashed')
+    second = {result.item: result.gathered async for result in engine.iter_results(config)}
+
+    assert first['conf']['size'] == 10
+    assert first['conf']['mode'] == '0640'
+    assert first['conf']['permissions'] == '-rw-r-----'
+    assert first['conf']['hash'] == hashlib.sha256(b'port=8080\n').hexdigest()
+    assert second['conf']['hash'] == first['conf']['hash']
+    assert (hashed, stats.get('file.hashed'), stats.get('file.hash_reused')) == (1, None, 1)
+    assert first['missing']['exists'] is False
+    assert first['missing']['error'] == 'NOERROR'
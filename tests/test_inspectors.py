@@ -1,5 +1,6 @@
 import pytest
-from janch.components.inspectors import EqualsInspector, RegexInspector
+from janch.components.inspectors import EqualsInspector, RegexInspector, LessThanInspector, \
+    GreaterThanInspector
 
 
 @pytest.mark.asyncio
@@ -26,3 +27,10 @@ async def test_regex_inspector():
 
     assert result['match'] is True
     assert result['actual'] == target
+
+
+@pytest.mark.asyncio
+async def test_comparison_inspectors():
+    assert (await LessThanInspector({}).inspect(120.5, 300))['match'] is True
+    assert (await LessThanInspector({}).inspect(None, 300))['match'] is False
+    assert (await GreaterThanInspector({}).inspect('2048', 1024))['match'] is True
@@ -0,0 +1,70 @@
+import pytest
+
+from janch.api import main
+from janch.components.inspectors import EqualsInspector
+from janch.utils import context, engine, plan
+
+
+class CountingInspector(EqualsInspector):
+    prepared = 0
+
+    @staticmethod
+    def type():
+        return 'counting'
+
+    def prepare(self, expression):
+        CountingInspector.prepared += 1
+        return expression
+
+
+@pytest.fixture
+def initialized(janch_context):
+    yield janch_context
+
+    context.config.clear()
+    context.plan.clear()
+
+
+def test_compile_reports_every_invalid_inspection(janch_context):
+    config = {
+        'good': {'gather': {}, 'inspect': {'status': 200, 'html': '^ok',
+                                           'total_ms': {'type': 'lt', 'value': '300'}}},
+        'bad': {'gather': {}, 'inspect': {'html': '(', 'status': {'type': 'nope'}}}
+    }
+
+    with pytest.raises(ValueError) as e:
+        plan.compile(config, janch_context.inspectors)
+
+    assert 'bad: html: Invalid regular expression' in str(e.value)
+    assert 'status: unknown inspector nope' in str(e.value)
+    assert 'good' not in str(e.value)
+
+    item_plan = plan.compile({'good': config['good']}, janch_context.inspectors)['good']
+    prepared = {inspection.field: inspection.prepared for inspection in item_plan.inspections}
+
+    assert prepared['status'] == 200
+    assert prepared['html'].pattern == '^ok'
+    assert prepared['total_ms'] == 300.0
+    assert prepared['error'].pattern == 'NOERROR'
+
+
+@pytest.mark.asyncio
+async def test_plan_is_compiled_once_and_reused_by_every_run(initialized):
+    CountingInspector.prepared = 0
+    config = {'echo': {'gather': {'type': 'command', 'command_str': 'echo 1'},
+                       'inspect': {'result': {'type': 'counting', 'value': '1'}}}}
+
+    main.init(config, {}, inspectors={'counting': CountingInspector})
+    main.update_inspectors({'counting': CountingInspector})
+    CountingInspector.prepared = 0
+
+    for _ in range(3):
+        results = [result async for result in engine.iter_results()]
+        assert results[0].matched
+
+    assert CountingInspector.prepared == 0
+
+
+def test_init_rejects_invalid_inspections(initialized):
+    with pytest.raises(ValueError):
+        main.init({'bad': {'gather': {}, 'inspect': {'status': {'type': 'gt', 'value': 'x'}}}}, {})
@@ -0,0 +1,42 @@
+import pytest
+
+from janch.utils import engine, procfs, stats
+
+
+def test_parse_cpu_times_leaves_out_guest_time():
+    text = ("cpu  100 10 50 800 40 0 0 0 30 0\n"
+            "cpu0 50 5 25 400 20 0 0 0 15 0\n"
+            "cpu1 50 5 25 400 20 0 0 0 15 0\n"
+            "intr 12345\n")
+
+    assert procfs.parse_cpu_times(text) == (160, 40, 1000, 2)
+
+
+def test_parse_meminfo_converts_to_bytes():
+    text = "MemTotal:        1000 kB\nMemAvailable:     250 kB\nHugePages_Total:       0\n"
+
+    assert procfs.parse_meminfo(text) == {'MemTotal': 1024000, 'MemAvailable': 256000,
+                                          'HugePages_Total': 0}
+
+
+@pytest.mark.asyncio
+async def test_items_of_a_run_share_each_reading():
+    config = {
+        'memory': {'gather': {'type': 'memory'}},
+        'load': {'gather': {'type': 'load'}},
+        'cpu': {'gather': {'type': 'cpu', 'sample_seconds': 0.05}},
+        'cpu-again': {'gather': {'type': 'cpu', 'sample_seconds': 0.05, 'timeout': 5}},
+        'disk': {'gather': {'type': 'disk', 'path': '/'}},
+        'disk-again': {'gather': {'type': 'disk', 'path': '/', 'timeout': 5}}
+    }
+
+    results = {result.item: result.gathered async for result in engine.iter_results(config)}
+
+    assert all(gathered['error'] == 'NOERROR' for gathered in results.values())
+    assert 0 <= results['memory']['used_percent'] <= 100
+    assert results['load']['processes'] > 0
+    assert results['cpu'] == results['cpu-again']
+    assert results['disk']['total_bytes'] > 0
+    # /proc/stat, the cpu sample and the file system are each read once
+    assert stats.get('procfs.shared') == 2
+    assert stats.get('procfs.reads') == 5
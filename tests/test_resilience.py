@@ -0,0 +1,34 @@
+from janch.utils.resilience import RetryPolicy, CircuitBreaker
+
+
+def test_retry_policy():
+    policy = RetryPolicy(count=3, backoff=1, max_backoff=3, jitter=0, errors=['ClientConnectorError'])
+
+    assert policy.is_retryable({'status': 503, 'error': 'NOERROR'})
+    assert not policy.is_retryable({'status': 200, 'error': 'NOERROR'})
+    assert not policy.is_retryable({'error': 'permission denied'})
+    assert [policy.get_delay(attempt) for attempt in range(4)] == [1, 2, 3, 3]
+
+
+def test_circuit_breaker_opens_and_lets_one_trial_through():
+    breaker = CircuitBreaker(threshold=2, reset=0)
+
+    breaker.record('down.example.com', False)
+    assert breaker.allow('down.example.com')
+
+    breaker.record('down.example.com', False)
+    assert breaker.is_open('down.example.com')
+
+    # Only one gather at a time is let through once the reset time has passed
+    assert breaker.allow('down.example.com')
+    assert not breaker.allow('down.example.com')
+
+    breaker.record('down.example.com', True)
+    assert not breaker.is_open('down.example.com')
+    assert breaker.allow('up.example.com')
+
+
+def test_circuit_breaker_is_off_unless_configured():
+    assert CircuitBreaker.from_settings(None) is None
+    assert CircuitBreaker.from_settings({'reset': 10}) is None
+    assert CircuitBreaker.from_settings({'threshold': 3}).threshold == 3
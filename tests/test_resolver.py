@@ -0,0 +1,44 @@
+import pytest
+
+from janch.utils import engine, resolver, stats
+
+
+@pytest.mark.asyncio
+async def test_resolver_remembers_answers():
+    stats.reset()
+    lookups = resolver.Resolver(60)
+
+    first, first_cached = await lookups.lookup('localhost')
+    second, second_cached = await lookups.lookup('localhost')
+
+    assert first == second
+    assert (first_cached, second_cached) == (False, True)
+    assert stats.get('dns.lookups') == 1
+
+    with pytest.raises(OSError):
+        await lookups.lookup('name.invalid')
+
+    assert ('name.invalid', 0) not in lookups._answers
+
+
+@pytest.mark.asyncio
+async def test_dns_and_http_items_share_lookups(http_server):
+    url = http_server.replace('127.0.0.1', 'localhost')
+    config = {
+        'dns': {'gather': {'type': 'dns', 'name': 'localhost', 'family': 4}},
+        'dns-any': {'gather': {'type': 'dns', 'name': 'localhost'}},
+        'dns-again': {'gather': {'type': 'dns', 'name': 'localhost', 'timeout': 5}},
+        'http': {'gather': {'type': 'http', 'url': url}},
+        'missing': {'gather': {'type': 'dns', 'name': 'name.invalid'}}
+    }
+
+    results = {result.item: result.gathered async for result in engine.iter_results(config)}
+
+    assert results['dns']['addresses'] == ['127.0.0.1']
+    assert '127.0.0.1' in results['dns-any']['addresses']
+    assert results['http']['status'] == 200
+    assert results['missing']['error'] != 'NOERROR'
+    # localhost is looked up once for each family asked for, and name.invalid once
+    assert stats.get('dns.lookups') == 3
+    assert stats.get('dns.cached') == 2
+    assert resolver.get_resolver() is None
@@ -0,0 +1,33 @@
+import asyncio
+
+import pytest
+from janch.utils import stats
+from janch.utils.scheduler import Scheduler, get_host
+
+
+@pytest.mark.asyncio
+async def test_scheduler_limits():
+    stats.reset()
+    scheduler = Scheduler(limit=3, per_type={'command': 2}, per_host=1)
+    peaks = {'command': 0, 'example.com': 0}
+    running = {'command': 0, 'example.com': 0}
+
+    async def work(key, type, host=None):
+        async with scheduler.slot(type, host):
+            running[key] += 1
+            peaks[key] = max(peaks[key], running[key])
+            await asyncio.sleep(0.01)
+            running[key] -= 1
+
+    await asyncio.gather(*[work('command', 'command') for _ in range(6)],
+                         *[work('example.com', 'http', 'example.com') for _ in range(4)])
+
+    assert peaks == {'command': 2, 'example.com': 1}
+    assert stats.get('scheduler.in_flight')['max'] <= 3
+    assert stats.get('scheduler.wait_ms')['count'] == 10
+
+
+def test_get_host():
+    assert get_host({'url': 'https://example.com:8443/status'}) == 'example.com'
+    assert get_host({'host': 'localhost', 'port': 22}) == 'localhost'
+    assert get_host({'command_str': 'ls'}) is None
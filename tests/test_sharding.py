@@ -0,0 +1,32 @@
+import pytest
+from janch.utils import sharding
+
+
+def test_shards_cover_every_item_once():
+    config = {f"item-{i}": {} for i in range(200)}
+
+    shards = [sharding.select(config, i, 5) for i in range(1, 6)]
+
+    assert sum(len(shard) for shard in shards) == len(config)
+    assert set().union(*shards) == set(config)
+    assert all(shard for shard in shards)
+
+
+def test_few_items_move_when_shards_are_added():
+    items = [f"item-{i}" for i in range(1000)]
+
+    moved = [item for item in items if sharding.get_shard(item, 5) != sharding.get_shard(item, 6)]
+
+    # Only the items taken by the new shard move
+    assert all(sharding.get_shard(item, 6) == 6 for item in moved)
+    assert len(moved) < 250
+
+
+def test_parse():
+    assert sharding.parse('2/5') == (2, 5)
+
+    with pytest.raises(ValueError):
+        sharding.parse('6/5')
+
+    with pytest.raises(ValueError):
+        sharding.parse('two')
@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+from janch.utils import engine, shells, stats
+
+
+@pytest.mark.asyncio
+async def test_pool_reuses_shells_and_frames_output():
+    stats.reset()
+    pool = shells.ShellPool(1)
+
+    try:
+        first = await pool.run("echo out; echo err >&2; exit 3")
+        second = await pool.run("printf 'no newline'")
+        third = await pool.run("cd /; read line; echo \"[$line]\"; pwd")
+        fourth = await pool.run("pwd")
+    finally:
+        await pool.close()
+
+    assert [(stdout.getvalue(), stderr.getvalue(), status)
+            for stdout, stderr, status in (first, second)] == \
+        [(b"out\n", b"err\n", 3), (b"no newline", b"", 0)]
+    assert third[0].getvalue() == b"[]\n/\n"
+    assert third[2] == 0
+    assert fourth[0].getvalue() != b"/\n"
+    assert stats.get('shells.started') == 1
+    assert stats.get('shells.commands') == 4
+
+
+@pytest.mark.asyncio
+async def test_pool_replaces_a_shell_whose_command_was_cancelled():
+    stats.reset()
+    pool = shells.ShellPool(1)
+
+    try:
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(pool.run("sleep 10"), 0.2)
+
+        stdout, stderr, status = await pool.run("echo again")
+        assert (stdout.getvalue(), status) == (b"again\n", 0)
+    finally:
+        await pool.close()
+
+    assert stats.get('shells.started') == 2
+
+
+@pytest.mark.asyncio
+async def test_command_items_run_on_the_pool_of_the_run(janch_context):
+    janch_context.settings['shells'] = {'size': 2}
+    janch_context.settings['concurrency'] = {'per_type': {'command': 4}}
+
+    config = {f"item{i}": {'gather': {'type': 'command', 'command_str': f"echo {i}; exit {i}"}}
+              for i in range(4)}
+
+    results = {result.item: result.gathered async for result in engine.iter_results(config)}
+
+    assert [results[f"item{i}"]['result'] for i in range(4)] == ['0', '1', '2', '3']
+    assert [results[f"item{i}"]['exit_status'] for i in range(4)] == [0, 1, 2, 3]
+    assert stats.get('shells.started') <= 2
+    assert shells.get_pool() is None
+
+
+@pytest.mark.asyncio
+async def test_pool_bounds_output_and_stops_on_a_match():
+    stats.reset()
+    pool = shells.ShellPool(1)
+
+    try:
+        stdout, stderr, status = await pool.run("head -c 100000 /dev/zero | tr '\\0' x", 1000)
+        stopped, _, stopped_status = await pool.run("echo ready; sleep 10", stop_on='ready')
+        after, _, _ = await pool.run("echo after")
+    finally:
+        await pool.close()
+
+    assert stdout.size == 100000
+    assert stdout.truncated
+    assert status == 0
+    assert stopped.stopped and stopped_status is None
+    assert after.decode() == 'after'
+    assert stats.get('shells.started') == 2
@@ -0,0 +1,30 @@
+import pytest
+from janch.utils import context
+from janch.utils.watcher import Watcher, watch
+
+
+@pytest.mark.asyncio
+async def test_watch_reruns_items_on_their_interval(capsys):
+    context.settings.update({'jitter': 0})
+
+    config = {
+        'often': {'interval': 0.1, 'gather': {'type': 'command', 'command_str': 'echo often'}},
+        'rarely': {'interval': 10, 'gather': {'type': 'command', 'command_str': 'echo rarely'}}
+    }
+
+    watcher = await watch(config, until=0.45)
+
+    assert watcher.counts['often'] >= 4
+    assert watcher.counts['rarely'] == 1
+    assert 'often' in capsys.readouterr().out
+
+
+def test_schedule_orders_by_due_time():
+    watcher = Watcher({'a': {}, 'b': {}, 'c': {}})
+
+    watcher.schedule('a', 3)
+    watcher.schedule('b', 1)
+    watcher.schedule('c', 2)
+
+    assert [item for due, seq, item in sorted(watcher._heap)] == ['b', 'c', 'a']
+    assert watcher._heap[0][2] == 'b'
@@ -0,0 +1,59 @@
+import os
+
+import pytest
+from janch.components.gatherers import CommandGatherer
+from janch.utils import stats, workers
+from janch.utils.constants import WORKER_DIED
+
+
+def test_partition_deals_items_in_turn():
+    config = {f"item-{i}": {} for i in range(5)}
+
+    parts = workers.partition(config, 2)
+
+    assert list(parts[0]) == ['item-0', 'item-2', 'item-4']
+    assert list(parts[1]) == ['item-1', 'item-3']
+
+
+@pytest.mark.asyncio
+async def test_workers_log_results_in_config_order(capsys):
+    config = {
+        'slow': {'gather': {'type': 'command', 'command_str': 'sleep 0.3; echo slow'}},
+        'fast': {'gather': {'type': 'command', 'command_str': 'echo fast'}},
+        'faster': {'gather': {'type': 'command', 'command_str': 'echo faster'}}
+    }
+
+    await workers.start(2, config)
+
+    lines = [line.split()[0] for line in capsys.readouterr().out.splitlines() if line.strip()]
+
+    assert [line for line in lines if line != 'item'] == ['slow', 'fast', 'faster']
+    assert stats.get('gathers.run') == 3
+
+
+class DyingGatherer(CommandGatherer):
+    @staticmethod
+    def type():
+        return 'dying'
+
+    async def main(self, command_str):
+        os._exit(1)
+
+
+@pytest.mark.asyncio
+async def test_items_of_a_worker_that_died_are_reported(capsys, janch_context):
+    janch_context.gatherers['dying'] = DyingGatherer
+    config = {
+        'a': {'gather': {'type': 'command', 'command_str': 'echo a'}},
+        'b': {'gather': {'type': 'dying', 'command_str': ''}},
+        'c': {'gather': {'type': 'command', 'command_str': 'echo c'}},
+        'd': {'gather': {'type': 'command', 'command_str': 'echo d'}}
+    }
+
+    await workers.start(2, config)
+
+    lines = [line.split() for line in capsys.readouterr().out.splitlines() if line.strip()]
+    errors = {line[0]: line[4] for line in lines if line[0] != 'item' and line[2] == 'error'}
+
+    assert errors == {'a': 'NOERROR', 'b': WORKER_DIED, 'c': 'NOERROR', 'd': WORKER_DIED}
+    assert stats.get('workers.lost') == 2